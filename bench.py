@@ -0,0 +1,136 @@
+"""
+Times the Brewin programs under bench/ against one or more interpreter versions; is entry-point
+for benchmarking.
+"""
+
+import argparse
+import importlib
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from glob import glob
+from os.path import basename, exists
+
+from brewinalloc import audit_program
+
+
+def load_workloads(version, names=None):
+    """Collect bench/v{version}/*.brewin workloads (optionally only the given names)."""
+    workloads = []
+    for srcfile in sorted(glob(f"bench/v{version}/*.brewin")):
+        name = basename(srcfile)[: -len(".brewin")]
+        if names and name not in names:
+            continue
+        expfile = srcfile[: -len(".brewin")] + ".exp"
+        with open(srcfile, encoding="utf-8") as handle:
+            program = handle.readlines()
+        expected = None
+        if exists(expfile):
+            with open(expfile, encoding="utf-8") as handle:
+                expected = list(map(lambda x: x.rstrip("\n"), handle.readlines()))
+        workloads.append({"name": name, "program": program, "expected": expected})
+    return workloads
+
+
+def time_workload(interpreter_lib, workload, repeat):
+    """
+    Run one workload `repeat` times, then once more under tracemalloc. Returns a dict with the
+    median wall time (seconds), the statements executed per run, statements/sec, the peak
+    traced memory (bytes) and whether every run's output matched the .exp file.
+    """
+    timings = []
+    correct = True
+    steps = 0
+    for _ in range(repeat):
+        interpreter = interpreter_lib.Interpreter(False, None, False)
+        start = time.perf_counter()
+        interpreter.run(workload["program"])
+        timings.append(time.perf_counter() - start)
+        steps = interpreter.steps
+        if workload["expected"] is not None:
+            correct = correct and interpreter.get_output() == workload["expected"]
+
+    # measured separately: tracing allocations slows the run down too much to time it
+    tracemalloc.start()
+    try:
+        interpreter_lib.Interpreter(False, None, False).run(workload["program"])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = statistics.median(timings)
+    return {
+        "median": median,
+        "statements": steps,
+        "statements_per_sec": steps / median if median else 0.0,
+        "peak_memory": peak,
+        "correct": correct,
+    }
+
+
+def format_table(records):
+    """Render benchmark records as a text table, one row per (workload, version)."""
+    lines = [
+        f"{'workload':<16} {'ver':>3} {'median ms':>10} {'stmts/sec':>12} {'peak KiB':>10}",
+    ]
+    for record in sorted(records, key=lambda record: (record["workload"], record["version"])):
+        status = "" if record["correct"] else "  WRONG OUTPUT"
+        lines.append(
+            f"{record['workload']:<16} {record['version']:>3} {record['median'] * 1000:10.2f} "
+            f"{record['statements_per_sec']:12.0f} {record['peak_memory'] / 1024:10.1f}{status}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    """main entrypoint: argparses, times every selected workload, prints a table and/or JSON"""
+    parser = argparse.ArgumentParser(description="Time Brewin workloads under bench/.")
+    parser.add_argument(
+        "versions",
+        help="interpreter versions to benchmark: one of 1, 2, 3, a list such as 2,3, or all",
+    )
+    parser.add_argument("names", nargs="*", help="only run these workloads")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per workload")
+    parser.add_argument(
+        "--alloc-audit",
+        action="store_true",
+        help="also run each workload under the allocation audit and record the bytes each "
+        "Brewin construct allocated (in the JSON output)",
+    )
+    parser.add_argument(
+        "--json",
+        metavar="PATH",
+        help="also write the results as JSON to PATH (- for stdout, replacing the table)",
+    )
+    args = parser.parse_args()
+
+    versions = ["1", "2", "3"] if args.versions == "all" else args.versions.split(",")
+    records = []
+    for version in versions:
+        interpreter_lib = importlib.import_module(f"interpreterv{version}")
+        for workload in load_workloads(version, args.names):
+            result = time_workload(interpreter_lib, workload, args.repeat)
+            if args.alloc_audit:
+                report = audit_program(interpreter_lib, workload["program"], interval=None)
+                result["allocations"] = {
+                    row["name"]: row["bytes"] for row in report["constructs"]
+                }
+            records.append({"workload": workload["name"], "version": version, **result})
+    if not records:
+        print(f"No workloads found for version(s) {args.versions}")
+        sys.exit(1)
+
+    if args.json == "-":
+        json.dump(records, sys.stdout, indent=2)
+        print()
+        return
+    print(format_table(records))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(records, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Runs a single Brewin program, optionally under the Brewin-level profilers; is entry-point
+for running and profiling programs outside of the test harness.
+"""
+
+import argparse
+import importlib
+import json
+import sys
+from contextlib import ExitStack
+
+from brewinheap import HeapWatcher, diff_snapshots, format_diff, format_snapshot, heap_snapshot
+from brewinprof import SamplingProfiler
+from brewintrace import DEFAULT_TRACE_SIZE, ExecutionTrace
+
+
+def parse_steps(value):
+    """argparse type for --heap: comma-separated statement counts (possibly none)"""
+    return [int(step) for step in value.split(",") if step]
+
+
+def write_samples(sampler, path):
+    """Write a SamplingProfiler's folded stacks to path and say so on stderr."""
+    sampler.write_folded(path)
+    print(f"{sampler.total()} samples written to {path}", file=sys.stderr)
+
+
+def heap_report(snapshots, as_json):
+    """The heap snapshots, and the change between each consecutive pair, as text or JSON."""
+    diffs = [diff_snapshots(before, after) for before, after in zip(snapshots, snapshots[1:])]
+    if as_json:
+        return json.dumps({"snapshots": snapshots, "diffs": diffs}, indent=2)
+    return "\n\n".join(list(map(format_snapshot, snapshots)) + list(map(format_diff, diffs)))
+
+
+def main():
+    """main entrypoint: argparses, runs the program, then prints any requested report"""
+    parser = argparse.ArgumentParser(description="Run a Brewin program.")
+    parser.add_argument("program", help="path to a .brewin file")
+    parser.add_argument("--version", default="3", help="interpreter version (1, 2 or 3)")
+    parser.add_argument("--input", help="file to read inputi/inputs lines from (default: stdin)")
+    parser.add_argument(
+        "--profile-methods",
+        action="store_true",
+        help="(v3) report calls, self time and cumulative time per Brewin method",
+    )
+    parser.add_argument(
+        "--sort",
+        choices=["cumulative", "self", "calls"],
+        default="cumulative",
+        help="order of the method profile",
+    )
+    parser.add_argument(
+        "--profile-lines",
+        action="store_true",
+        help="(v2/v3) annotate the source with statement/expression counts and time per line",
+    )
+    parser.add_argument(
+        "--sample",
+        metavar="PATH",
+        help="sample the Brewin call stack on a CPU timer and write folded stacks to PATH",
+    )
+    parser.add_argument(
+        "--sample-interval",
+        type=float,
+        default=0.001,
+        metavar="SECONDS",
+        help="with --sample, CPU seconds between samples",
+    )
+    parser.add_argument(
+        "--trace",
+        nargs="?",
+        type=int,
+        const=DEFAULT_TRACE_SIZE,
+        metavar="N",
+        help=f"keep the last N statements (default {DEFAULT_TRACE_SIZE}) and print them on error",
+    )
+    parser.add_argument(
+        "--heap",
+        nargs="?",
+        type=parse_steps,
+        const=[],
+        metavar="N,N,...",
+        help="snapshot the live Brewin heap after each listed statement count and at the end, "
+        "and report instances, fields and bytes per class and the change between snapshots",
+    )
+    parser.add_argument("--json", action="store_true", help="print reports as JSON")
+    args = parser.parse_args()
+
+    interpreter_lib = importlib.import_module(f"interpreterv{args.version}")
+    with open(args.program, encoding="utf-8") as handle:
+        program = handle.readlines()
+    stdin = None
+    if args.input:
+        with open(args.input, encoding="utf-8") as handle:
+            stdin = list(map(lambda x: x.rstrip("\n"), handle.readlines()))
+
+    options = {}
+    if args.profile_methods:
+        if args.version != "3":
+            parser.error("--profile-methods needs --version 3")
+        options["profile_methods"] = True
+    if args.profile_lines:
+        if args.version not in ("2", "3"):
+            parser.error("--profile-lines needs --version 2 or 3")
+        options["profile_lines"] = True
+    interpreter = interpreter_lib.Interpreter(True, stdin, args.trace is not None, **options)
+    if args.trace is not None:
+        interpreter.trace = ExecutionTrace(args.trace)
+
+    watcher = None
+    try:
+        with ExitStack() as contexts:
+            if args.sample:
+                sampler = contexts.enter_context(SamplingProfiler(interpreter, args.sample_interval))
+                contexts.callback(write_samples, sampler, args.sample)
+            if args.heap is not None:
+                watcher = contexts.enter_context(HeapWatcher(interpreter, args.heap))
+            interpreter.run(program)
+    finally:
+        if args.profile_methods:
+            profiler = interpreter.method_profiler
+            report = profiler.to_json(args.sort) if args.json else profiler.format_table(args.sort)
+            print(report, file=sys.stderr)
+        if args.profile_lines:
+            profiler = interpreter.line_profiler
+            report = profiler.to_json() if args.json else profiler.annotate(program)
+            print(report, file=sys.stderr)
+        if watcher is not None:
+            snapshots = watcher.snapshots + [heap_snapshot(interpreter)]
+            print(heap_report(snapshots, args.json), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+"""
+Allocation audit: runs a Brewin program and attributes the memory the interpreter allocates to
+interpreter source lines and to the Brewin constructs (call, let, new, binop, print, ...) that
+allocated it; is entry-point for allocation audits.
+
+The main view measures allocation churn. A line tracer on the interpreter's own modules reads
+tracemalloc's traced-memory counter and sys.getallocatedblocks() at every line, and charges any
+growth since the previous reading to the line that just ran: the per-call dicts and lists (argument
+bindings, let bindings, argument lists) count as much as values, and a temporary that is freed
+right away counts as much as one that lives for the whole run. Callees in other modules (the
+parser, the standard library) are charged to the interpreter line that called them, less the frame
+objects tracing builds for each call; frees are ignored, so a temporary made and dropped within a
+single line is missed.
+
+A secondary view runs the program again and reports what is still live: it snapshots the heap
+every `interval` executed statements (at the interpreter's check_budget points: loop back-edges
+and method entries) and once more at the end of the run, and reports the average blocks and
+bytes live at those samples. It covers every Python block, parse trees and caches included, but
+short-lived temporaries only count in proportion to how long they live.
+"""
+
+import argparse
+import ast
+import importlib
+import json
+import linecache
+import os
+import sys
+import tracemalloc
+
+import bparser
+from intbase import InterpreterBase
+
+# evaluator functions whose allocations belong to one construct, wherever they are called from
+FUNCTION_CONSTRUCTS = {
+    "run_method": "call",
+    "call_function": "call",
+    "__execute_call": "call",
+    "__execute_new": "new",
+    "create_parameterized_class": "new",
+    "__execute_binary_operator": "binop",
+    "__execute_logical_operator": "binop",
+    "__execute_not": "binop",
+    "__parse_binary_arguments": "binop",
+    "__execute_expression": "expression",
+    "__execute_statement": "statement",
+    "__discover_all_classes_and_track_them": "discovery",
+    "__check_valid_method_types": "discovery",
+}
+
+# class-level dispatch tables whose entries (lambdas) allocate on behalf of one construct
+TABLE_CONSTRUCTS = {
+    "PRIMITIVE_OPERATIONS": "binop",
+}
+
+# the InterpreterBase constants __execute_statement dispatches on, by attribute name
+STATEMENT_CONSTANTS = {
+    name: value
+    for name, value in vars(InterpreterBase).items()
+    if name.endswith("_DEF") and isinstance(value, str)
+}
+
+
+def statement_branches(function):
+    """
+    (first line, last line, statement keyword) for each branch of __execute_statement's
+    `if method_body[0] == InterpreterBase.X_DEF: ... elif ...` chain.
+    """
+    branches = []
+    for node in function.body:
+        while isinstance(node, ast.If):
+            test = node.test
+            if (
+                isinstance(test, ast.Compare)
+                and len(test.comparators) == 1
+                and isinstance(test.comparators[0], ast.Attribute)
+                and test.comparators[0].attr in STATEMENT_CONSTANTS
+            ):
+                keyword = STATEMENT_CONSTANTS[test.comparators[0].attr]
+                branches.append((node.body[0].lineno, node.body[-1].end_lineno, keyword))
+            node = node.orelse[0] if len(node.orelse) == 1 else None
+    return branches
+
+
+def construct_lines(path):
+    """
+    Map line number -> construct for the labelled functions and dispatch tables (and statement
+    branches) in path.
+    """
+    with open(path, encoding="utf-8") as handle:
+        tree = ast.parse(handle.read(), path)
+    lines = {}
+    branches = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and len(node.targets) == 1:
+            name = getattr(node.targets[0], "id", None)
+            if name in TABLE_CONSTRUCTS:
+                for line in range(node.lineno, node.end_lineno + 1):
+                    lines[line] = TABLE_CONSTRUCTS[name]
+            continue
+        if not isinstance(node, ast.FunctionDef) or node.name not in FUNCTION_CONSTRUCTS:
+            continue
+        for line in range(node.lineno, node.end_lineno + 1):
+            lines[line] = FUNCTION_CONSTRUCTS[node.name]
+        if node.name == "__execute_statement":
+            branches += statement_branches(node)
+    for first, last, keyword in branches:
+        for line in range(first, last + 1):
+            lines[line] = keyword
+    return lines
+
+
+class Attributor:
+    """Labels allocation sites (tracebacks or live frames) with a construct and a source location."""
+
+    def __init__(self, interpreter_lib):
+        classes_lib = sys.modules[interpreter_lib.ClassInstance.__module__]
+        self.directory = os.path.dirname(os.path.abspath(interpreter_lib.__file__))
+        self.lines = {
+            os.path.abspath(module.__file__): construct_lines(module.__file__)
+            for module in (interpreter_lib, classes_lib)
+        }
+        self.parser_file = os.path.abspath(bparser.__file__)
+        # the audit's own bookkeeping, left out of the samples
+        self.ignored_files = {os.path.abspath(__file__), os.path.abspath(tracemalloc.__file__)}
+        self.paths = {}  # filename -> absolute path
+        self.labels = {}  # traceback -> (construct, location), or None if ignored
+
+    def path(self, filename):
+        """The absolute path of a code object's filename, memoized."""
+        path = self.paths.get(filename)
+        if path is None:
+            path = self.paths[filename] = os.path.abspath(filename)
+        return path
+
+    def attribute(self, sites):
+        """
+        (construct, location) for (filename, line number) pairs, innermost first: the construct
+        of the innermost one in a labelled evaluator function, and the innermost one in the
+        interpreter's directory.
+        """
+        construct = location = None
+        for filename, lineno in sites:
+            path = self.path(filename)
+            if location is None and os.path.dirname(path) == self.directory:
+                location = f"{os.path.basename(path)}:{lineno}"
+            if path == self.parser_file:
+                construct = "parse"
+            elif path in self.lines:
+                construct = self.lines[path].get(lineno)
+            if construct is not None:
+                break
+        return construct or "other", location or "(outside the interpreter)"
+
+    def label(self, traceback):
+        """
+        attribute() for a tracemalloc traceback, memoized; None for blocks the audit allocated
+        itself (the audit's code is inside the traceback's innermost interpreter frame).
+        """
+        if traceback in self.labels:
+            return self.labels[traceback]
+        # tracemalloc orders frames oldest first
+        for frame in reversed(traceback):
+            path = self.path(frame.filename)
+            if path in self.ignored_files:
+                self.labels[traceback] = None
+                return None
+            if os.path.dirname(path) == self.directory:
+                break
+        labels = self.attribute((frame.filename, frame.lineno) for frame in reversed(traceback))
+        self.labels[traceback] = labels
+        return labels
+
+
+class AllocationTracer:
+    """
+    Charges the blocks and bytes allocated while each interpreter line runs to that line and its
+    construct, as described in the module doc. Used as a context manager around run(), with
+    tracemalloc already tracing.
+    """
+
+    def __init__(self, attributor):
+        self.attributor = attributor
+        self.files = set(attributor.lines)
+        self.traced_codes = {}  # code object -> whether its lines are traced
+        self.labels = {}  # (code, line) -> (construct, location), for lines in labelled functions
+        self.current = None  # labels of the line running since the last reading
+        self.last_bytes = self.last_blocks = 0
+        self.by_construct = {}
+        self.by_location = {}
+
+    def is_traced(self, code):
+        """Whether code belongs to one of the interpreter modules, memoized."""
+        traced = self.traced_codes.get(code)
+        if traced is None:
+            traced = self.traced_codes[code] = self.attributor.path(code.co_filename) in self.files
+        return traced
+
+    def label(self, frame):
+        """(construct, location) of the line frame is about to run."""
+        code, lineno = frame.f_code, frame.f_lineno
+        labels = self.labels.get((code, lineno))
+        if labels is not None:
+            return labels
+        path = self.attributor.path(code.co_filename)
+        construct = self.attributor.lines[path].get(lineno)
+        location = f"{os.path.basename(path)}:{lineno}"
+        if construct is None:
+            # a helper outside the labelled functions: charged to the construct that called it
+            construct, _ = self.attributor.attribute(
+                (caller.f_code.co_filename, caller.f_lineno) for caller in walk(frame.f_back)
+            )
+            return construct, location
+        labels = self.labels[(code, lineno)] = (construct, location)
+        return labels
+
+    def charge(self, overhead=0):
+        """
+        Charge the growth since the last reading, less `overhead` bytes the tracing itself
+        allocated, to the line that was running.
+        """
+        size, _ = tracemalloc.get_traced_memory()
+        size -= overhead
+        blocks = sys.getallocatedblocks()
+        if self.current is not None and (size > self.last_bytes or blocks > self.last_blocks):
+            for totals, key in zip((self.by_construct, self.by_location), self.current):
+                entry = totals.get(key)
+                if entry is None:
+                    entry = totals[key] = [0, 0]
+                entry[0] += max(0, blocks - self.last_blocks)
+                entry[1] += max(0, size - self.last_bytes)
+        # re-read, so the bookkeeping above isn't charged to the next line
+        self.last_bytes, _ = tracemalloc.get_traced_memory()
+        self.last_blocks = sys.getallocatedblocks()
+
+    def trace_call(self, frame, event, arg):
+        """sys.settrace hook: line-traces the interpreter's frames and nothing else."""
+        # tracing makes Python build a frame object for every call; that one isn't the program's
+        self.charge(sys.getsizeof(frame))
+        if not self.is_traced(frame.f_code):
+            return None
+        self.current = None
+        return self.trace_line
+
+    def trace_line(self, frame, event, arg):
+        """Local trace hook for an interpreter frame."""
+        self.charge()
+        if event == "line":
+            self.current = self.label(frame)
+        elif event == "return":
+            caller = frame.f_back
+            if caller is not None and self.is_traced(caller.f_code):
+                self.current = self.label(caller)
+            else:
+                self.current = None
+        return self.trace_line
+
+    def __enter__(self):
+        self.last_bytes, _ = tracemalloc.get_traced_memory()
+        self.last_blocks = sys.getallocatedblocks()
+        sys.settrace(self.trace_call)
+        return self
+
+    def __exit__(self, *exc_info):
+        sys.settrace(None)
+        return False
+
+
+def walk(frame):
+    """frame and its callers, innermost first."""
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+
+
+def audit_program(interpreter_lib, program, stdin=None, interval=1000, frames=8):
+    """
+    Run a program under the allocation tracer, then (unless interval is None) once more under
+    tracemalloc, sampling the live heap every `interval` statements and at the end. Returns a
+    dict with the number of samples and statements, the total "blocks" and "bytes" allocated,
+    "constructs" and "locations": lists of {name, blocks, bytes} allocated (locations also carry
+    their source "code"), most bytes first, and "live_constructs" and "live_locations": lists of
+    {name, blocks, bytes} (averages per sample), largest first (empty without sampling).
+    """
+    attributor = Attributor(interpreter_lib)
+    tracer = AllocationTracer(attributor)
+    by_construct = {}
+    by_location = {}
+    samples = 0
+
+    def sample():
+        nonlocal samples
+        samples += 1
+        for statistic in tracemalloc.take_snapshot().statistics("traceback"):
+            labels = attributor.label(statistic.traceback)
+            if labels is None:
+                continue
+            construct, location = labels
+            for totals, key in ((by_construct, construct), (by_location, location)):
+                entry = totals.setdefault(key, [0, 0])
+                entry[0] += statistic.count
+                entry[1] += statistic.size
+
+    interpreter = interpreter_lib.Interpreter(False, stdin, False)
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(1)
+    try:
+        with tracer:
+            interpreter.run(program)
+    finally:
+        if started:
+            tracemalloc.stop()
+
+    if interval is not None:
+        # a second run: the tracer slows every line down, and its samples need deeper tracebacks
+        traced = interpreter_lib.Interpreter(False, stdin, False)
+        check_budget = traced.check_budget
+        next_sample = interval
+
+        def sampling_check_budget():
+            nonlocal next_sample
+            if traced.steps >= next_sample:
+                next_sample = traced.steps + interval
+                sample()
+            check_budget()
+
+        traced.check_budget = sampling_check_budget
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(frames)
+        try:
+            traced.run(program)
+            sample()
+        finally:
+            if started:
+                tracemalloc.stop()
+
+    def allocated(totals):
+        rows = [
+            {"name": name, "blocks": blocks, "bytes": size}
+            for name, (blocks, size) in totals.items()
+        ]
+        rows.sort(key=lambda row: (-row["bytes"], row["name"]))
+        return rows
+
+    def averaged(totals):
+        rows = [
+            {"name": name, "blocks": blocks / samples, "bytes": size / samples}
+            for name, (blocks, size) in totals.items()
+        ]
+        rows.sort(key=lambda row: (-row["bytes"], row["name"]))
+        return rows
+
+    locations = allocated(tracer.by_location)
+    for row in locations:
+        filename, _, lineno = row["name"].rpartition(":")
+        path = os.path.join(attributor.directory, filename)
+        row["code"] = linecache.getline(path, int(lineno)).strip()
+    constructs = allocated(tracer.by_construct)
+    return {
+        "samples": samples,
+        "statements": interpreter.steps,
+        "interval": interval,
+        "blocks": sum(row["blocks"] for row in constructs),
+        "bytes": sum(row["bytes"] for row in constructs),
+        "constructs": constructs,
+        "locations": locations,
+        "live_constructs": averaged(by_construct),
+        "live_locations": averaged(by_location),
+    }
+
+
+def format_report(report, limit=15):
+    """Render an audit_program report as ranked text tables, allocations first."""
+    lines = [
+        f"Allocation audit: {report['blocks']} blocks, {report['bytes'] / 1024:.1f} KiB "
+        f"allocated over {report['statements']} statements",
+    ]
+    for title, rows in (("construct", report["constructs"]), ("location", report["locations"])):
+        total = report["bytes"] or 1
+        lines.append("")
+        lines.append(f"{title:<28} {'blocks':>10} {'KiB':>10} {'%':>6}")
+        for row in rows[:limit]:
+            text = (
+                f"{row['name']:<28} {row['blocks']:>10} {row['bytes'] / 1024:10.1f} "
+                f"{row['bytes'] / total * 100:6.1f}"
+            )
+            if "code" in row:
+                text += f"  {row['code'][:60]}"
+            lines.append(text)
+    if not report["samples"]:
+        return "\n".join(lines)
+    lines.append("")
+    lines.append(
+        f"Live heap: {report['samples']} samples (every {report['interval']} statements); "
+        "averages of what was live at each sample"
+    )
+    for title, rows in (
+        ("construct", report["live_constructs"]),
+        ("location", report["live_locations"]),
+    ):
+        total = sum(row["bytes"] for row in rows) or 1.0
+        lines.append("")
+        lines.append(f"{title:<28} {'blocks':>10} {'KiB':>10} {'%':>6}")
+        for row in rows[:limit]:
+            lines.append(
+                f"{row['name']:<28} {row['blocks']:10.1f} {row['bytes'] / 1024:10.1f} "
+                f"{row['bytes'] / total * 100:6.1f}"
+            )
+    return "\n".join(lines)
+
+
+def main():
+    """main entrypoint: argparses, audits the program, prints the ranked tables or JSON"""
+    parser = argparse.ArgumentParser(description="Audit a Brewin program's Python allocations.")
+    parser.add_argument("program", help="path to a .brewin file")
+    parser.add_argument("--version", default="3", help="interpreter version (1, 2 or 3)")
+    parser.add_argument("--input", help="file to read inputi/inputs lines from")
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=1000,
+        help="statements between live-heap samples (0 skips the live-heap view)",
+    )
+    parser.add_argument("--frames", type=int, default=8, help="traceback depth to record")
+    parser.add_argument("--limit", type=int, default=15, help="rows per table")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    interpreter_lib = importlib.import_module(f"interpreterv{args.version}")
+    with open(args.program, encoding="utf-8") as handle:
+        program = handle.readlines()
+    stdin = None
+    if args.input:
+        with open(args.input, encoding="utf-8") as handle:
+            stdin = list(map(lambda x: x.rstrip("\n"), handle.readlines()))
+
+    interval = args.interval or None
+    report = audit_program(interpreter_lib, program, stdin, interval, args.frames)
+    print(json.dumps(report, indent=2) if args.json else format_report(report, args.limit))
+
+
+if __name__ == "__main__":
+    main()
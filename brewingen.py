@@ -0,0 +1,220 @@
+"""
+Generates synthetic Brewin v1/v2/v3 programs of configurable size, together with their expected
+output, and sweeps one size parameter to time each interpreter phase; is entry-point for
+stress and scaling tests.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import statistics
+
+# size parameters accepted by generate_program, with their defaults
+SIZE_DEFAULTS = {
+    "classes": 2,  # independent class hierarchies
+    "depth": 1,  # inherits-chain length below each hierarchy's base class (v2/v3)
+    "methods": 2,  # methods per hierarchy, spread over its levels
+    "templates": 0,  # template classes, each instantiated once as <name>@int (v3)
+    "nesting": 1,  # if/let blocks wrapped around the loop body
+    "trips": 10,  # iterations of main's loop
+    "objects": 1,  # objects created per hierarchy
+}
+
+
+def method_constant(hierarchy, level, method):
+    """The constant a generated method adds to its argument."""
+    return (7 * hierarchy + 3 * method + level) % 11 + 1
+
+
+def generate_program(version, **sizes):
+    """
+    Build a program for interpreter `version` (1, 2 or 3) from the SIZE_DEFAULTS parameters.
+    Every hierarchy is a chain c<h>_0 <- c<h>_1 <- ... <- c<h>_<depth>, where method m<j> lives
+    on level j % (depth + 1), so calls on the most-derived class walk the chain. main creates
+    `objects` instances of each chain's last class and, on every loop trip, calls every method on
+    every object (and put/get on every template instance), summing the results.
+    v1 has no inheritance, let or templates, so it ignores depth and templates.
+    Returns (program lines, expected output lines).
+    """
+    unknown = set(sizes) - set(SIZE_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown size parameters: {', '.join(sorted(unknown))}")
+    sizes = {**SIZE_DEFAULTS, **sizes}
+    version = int(version)
+    typed = version >= 2
+    depth = sizes["depth"] if typed else 0
+    templates = sizes["templates"] if version >= 3 else 0
+    classes, methods = sizes["classes"], sizes["methods"]
+    objects, trips, nesting = sizes["objects"], sizes["trips"], sizes["nesting"]
+
+    lines = []
+    for hierarchy in range(classes):
+        for level in range(depth + 1):
+            header = f"(class c{hierarchy}_{level}"
+            if level:
+                header += f" inherits c{hierarchy}_{level - 1}"
+            lines.append(header)
+            # a field keeps method-less levels from being empty classes
+            lines.append(f"  (field int f{level} {level})" if typed else f"  (field f{level} {level})")
+            for method in range(level, methods, depth + 1):
+                constant = method_constant(hierarchy, level, method)
+                signature = f"int m{method} ((int x))" if typed else f"m{method} (x)"
+                lines.append(f"  (method {signature} (return (+ x {constant})))")
+            lines.append(")")
+    for template in range(templates):
+        lines += [
+            f"(tclass box{template} (field_type)",
+            "  (field field_type value)",
+            "  (method void put ((field_type v)) (set value v))",
+            "  (method field_type get () (return value))",
+            ")",
+        ]
+
+    receivers = [
+        (f"o{hierarchy}_{index}", f"c{hierarchy}_{depth}")
+        for hierarchy in range(classes)
+        for index in range(objects)
+    ]
+    boxes = [(f"b{template}", f"box{template}@int") for template in range(templates)]
+
+    def field(name, field_type, initial):
+        return f"  (field {field_type} {name} {initial})" if typed else f"  (field {name} {initial})"
+
+    lines.append("(class main")
+    lines.append(field("total", "int", 0))
+    if not typed:
+        lines.append(field("i", None, 0))
+    for name, class_name in receivers + boxes:
+        lines.append(field(name, class_name, "null"))
+
+    body = []
+    for name, class_name in receivers + boxes:
+        body.append(f"(set {name} (new {class_name}))")
+    step = []
+    for name, _ in receivers:
+        for method in range(methods):
+            step.append(f"(set total (+ total (call {name} m{method} i)))")
+    for name, _ in boxes:
+        step.append(f"(call {name} put i)")
+        step.append(f"(set total (+ total (call {name} get)))")
+    step = "(begin " + " ".join(step or ["(set total total)"]) + ")"
+    for level in reversed(range(nesting)):
+        if typed and level % 2:
+            step = f"(let ((int n{level} {level})) {step})"
+        else:
+            step = f"(if (>= i 0) {step})"
+    body.append(f"(while (< i {trips}) (begin {step} (set i (+ i 1))))")
+    body.append('(print "total " total)')
+
+    if typed:
+        lines.append("  (method void main ()")
+        lines.append("    (let ((int i 0))")
+    else:
+        lines.append("  (method main ()")
+        lines.append("    (begin")
+    lines += [f"      {statement}" for statement in body]
+    lines += ["    )", "  )", ")"]
+
+    per_trip_constant = sum(
+        method_constant(hierarchy, method % (depth + 1), method)
+        for hierarchy in range(classes)
+        for method in range(methods)
+    )
+    calls_per_trip = classes * objects * methods + templates
+    total = sum(calls_per_trip * trip + objects * per_trip_constant for trip in range(trips))
+    return [line + "\n" for line in lines], [f"total {total}"]
+
+
+def write_program(directory, name, program, expected):
+    """Write name.brewin and name.exp into directory (created if needed)."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{name}.brewin"), "w", encoding="utf-8") as handle:
+        handle.writelines(program)
+    with open(os.path.join(directory, f"{name}.exp"), "w", encoding="utf-8") as handle:
+        handle.writelines(line + "\n" for line in expected)
+
+
+def time_phases(interpreter_lib, program, expected, repeat):
+    """
+    Run a program `repeat` times; return the median seconds per phase (parse, discovery,
+    execution), the statements executed and whether the output matched.
+    """
+    samples = {}
+    correct = True
+    steps = 0
+    for _ in range(repeat):
+        interpreter = interpreter_lib.Interpreter(False, None, False)
+        interpreter.run(program)
+        correct = correct and interpreter.get_output() == expected
+        steps = interpreter.steps
+        for phase, seconds in interpreter.phase_times.items():
+            samples.setdefault(phase, []).append(seconds)
+    phases = {phase: statistics.median(values) for phase, values in samples.items()}
+    return {**phases, "statements": steps, "correct": correct}
+
+
+def sweep(version, parameter, values, sizes, repeat):
+    """Time each phase with `parameter` set to each of `values` (other sizes fixed)."""
+    interpreter_lib = importlib.import_module(f"interpreterv{version}")
+    records = []
+    for value in values:
+        program, expected = generate_program(version, **{**sizes, parameter: value})
+        record = time_phases(interpreter_lib, program, expected, repeat)
+        records.append({parameter: value, "lines": len(program), **record})
+    return records
+
+
+def format_sweep(parameter, records):
+    """Render sweep records as a text table."""
+    lines = [
+        f"{parameter:>10} {'lines':>7} {'parse ms':>10} {'discovery ms':>13} "
+        f"{'execution ms':>13} {'statements':>11}"
+    ]
+    for record in records:
+        status = "" if record["correct"] else "  WRONG OUTPUT"
+        lines.append(
+            f"{record[parameter]:>10} {record['lines']:>7} {record['parse'] * 1000:10.2f} "
+            f"{record['discovery'] * 1000:13.2f} {record['execution'] * 1000:13.2f} "
+            f"{record['statements']:>11}{status}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    """main entrypoint: argparses, then either writes one program or runs a size sweep"""
+    parser = argparse.ArgumentParser(description="Generate synthetic Brewin programs.")
+    parser.add_argument("version", help="Brewin dialect to generate (1, 2 or 3)")
+    for name, default in SIZE_DEFAULTS.items():
+        parser.add_argument(f"--{name}", type=int, default=default)
+    parser.add_argument("--out", default="generated", help="directory for generated files")
+    parser.add_argument("--name", default="synthetic", help="base name of generated files")
+    parser.add_argument(
+        "--sweep",
+        metavar="PARAM=V1,V2,...",
+        help="instead of writing files, time parse/discovery/execution with PARAM at each value",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="with --sweep, runs per size")
+    parser.add_argument("--json", action="store_true", help="with --sweep, print JSON")
+    args = parser.parse_args()
+
+    sizes = {name: getattr(args, name) for name in SIZE_DEFAULTS}
+    if args.sweep is None:
+        program, expected = generate_program(args.version, **sizes)
+        write_program(args.out, args.name, program, expected)
+        print(f"Wrote {args.out}/{args.name}.brewin ({len(program)} lines) and .exp")
+        return
+
+    parameter, _, values = args.sweep.partition("=")
+    if parameter not in SIZE_DEFAULTS:
+        parser.error(f"--sweep parameter must be one of {', '.join(SIZE_DEFAULTS)}")
+    values = [int(value) for value in values.split(",")]
+    records = sweep(args.version, parameter, values, sizes, args.repeat)
+    if args.json:
+        print(json.dumps(records, indent=2))
+    else:
+        print(format_sweep(parameter, records))
+
+
+if __name__ == "__main__":
+    main()
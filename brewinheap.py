@@ -0,0 +1,200 @@
+"""
+Heap inspector: snapshots the Brewin objects reachable from an interpreter's main object and
+active method frames, reporting instance counts, field counts and approximate bytes per Brewin
+class (template instantiations such as node@int are classes of their own), and diffs snapshots
+taken at different points of a run.
+
+A Brewin object's bytes are those of the Python objects that make it up: its ClassInstance (one
+per level of its inheritance chain), their attribute, field and method dicts, its field
+Variables and Values and their primitive payloads. Objects its fields refer to are counted
+separately, and class definitions, which every instance shares, not at all.
+"""
+
+import sys
+
+COUNTERS = ("instances", "fields", "bytes")
+
+
+def is_instance(item):
+    """Whether item is a (non-null) Brewin object of any interpreter version."""
+    return hasattr(item, "fields") and hasattr(item, "class_type")
+
+
+def whole_object(instance):
+    """The most-derived object an instance belongs to (v2/v3 keep one part per class level)."""
+    me = getattr(instance, "me", None)
+    return me[0] if me else instance
+
+
+def parts(instance):
+    """An object's ClassInstance for each level of its inheritance chain, most derived first."""
+    while instance is not None and is_instance(instance):
+        yield instance
+        instance = getattr(instance, "parent_object", None)
+
+
+def payload(slot):
+    """Unwrap a field or variable (Variable -> Value -> payload); returns (payload, wrappers)."""
+    wrappers = []
+    while hasattr(slot, "value"):
+        wrappers.append(slot)
+        slot = slot.value
+    return slot, wrappers
+
+
+def shallow_size(item):
+    """sys.getsizeof of item plus its instance dict, if it has one."""
+    size = sys.getsizeof(item)
+    if hasattr(item, "__dict__"):
+        size += sys.getsizeof(item.__dict__)
+    return size
+
+
+def object_footprint(instance):
+    """(field count, approximate bytes) of one Brewin object, as described in the module doc."""
+    fields = 0
+    size = sys.getsizeof(instance.me) if hasattr(instance, "me") else 0
+    for part in parts(instance):
+        size += shallow_size(part) + sys.getsizeof(part.fields) + sys.getsizeof(part.methods)
+        if hasattr(part, "override_stack"):
+            size += sys.getsizeof(part.override_stack)
+        for slot in part.fields.values():
+            fields += 1
+            value, wrappers = payload(slot)
+            size += sum(shallow_size(wrapper) for wrapper in wrappers)
+            if not is_instance(value):
+                size += sys.getsizeof(value)
+    return fields, size
+
+
+def frame_roots(interpreter):
+    """The receivers and variable values of every active method frame on the shadow stack."""
+    for frame in interpreter.call_stack or ():
+        yield frame[3]
+        for scope in frame[4]:
+            yield from scope.values()
+
+
+def reachable_objects(interpreter):
+    """Every Brewin object reachable from the main object and the active frames, each once."""
+    seen = set()
+    pending = [interpreter.main_object, *frame_roots(interpreter)]
+    while pending:
+        item, _ = payload(pending.pop())
+        if not is_instance(item):
+            continue
+        item = whole_object(item)
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        yield item
+        for part in parts(item):
+            pending.extend(part.fields.values())
+
+
+def heap_snapshot(interpreter):
+    """
+    Snapshot the live Brewin heap: a dict with the statements executed so far, the number of
+    active frames, and "classes", mapping each class name to its instances, fields and bytes.
+    Frames are only visible while interpreter.call_stack is kept (see HeapWatcher).
+    """
+    classes = {}
+    for instance in reachable_objects(interpreter):
+        fields, size = object_footprint(instance)
+        entry = classes.setdefault(str(instance.name), dict.fromkeys(COUNTERS, 0))
+        entry["instances"] += 1
+        entry["fields"] += fields
+        entry["bytes"] += size
+    return {
+        "statements": interpreter.steps,
+        "frames": len(interpreter.call_stack or ()),
+        "classes": classes,
+    }
+
+
+def diff_snapshots(before, after):
+    """Per-class change in instances, fields and bytes from one snapshot to a later one."""
+    zero = dict.fromkeys(COUNTERS, 0)
+    classes = {}
+    for name in sorted(set(before["classes"]) | set(after["classes"])):
+        old, new = before["classes"].get(name, zero), after["classes"].get(name, zero)
+        change = {counter: new[counter] - old[counter] for counter in COUNTERS}
+        if any(change.values()):
+            classes[name] = change
+    return {"from": before["statements"], "to": after["statements"], "classes": classes}
+
+
+def format_snapshot(snapshot):
+    """Render a snapshot as a text table, largest classes first."""
+    lines = [
+        f"Heap after {snapshot['statements']} statements ({snapshot['frames']} active frames):",
+        f"{'class':<24} {'instances':>10} {'fields':>10} {'KiB':>10}",
+    ]
+    rows = sorted(snapshot["classes"].items(), key=lambda item: (-item[1]["bytes"], item[0]))
+    for name, entry in rows:
+        lines.append(
+            f"{name:<24} {entry['instances']:>10} {entry['fields']:>10} "
+            f"{entry['bytes'] / 1024:10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def format_diff(diff):
+    """Render a diff_snapshots result as a text table of signed changes."""
+    lines = [
+        f"Heap change from statement {diff['from']} to {diff['to']}:",
+        f"{'class':<24} {'instances':>10} {'fields':>10} {'KiB':>10}",
+    ]
+    rows = sorted(diff["classes"].items(), key=lambda item: (-abs(item[1]["bytes"]), item[0]))
+    for name, change in rows:
+        lines.append(
+            f"{name:<24} {change['instances']:>+10} {change['fields']:>+10} "
+            f"{change['bytes'] / 1024:>+10.1f}"
+        )
+    if not rows:
+        lines.append("(no change)")
+    return "\n".join(lines)
+
+
+class HeapWatcher:
+    """
+    Takes a heap snapshot each time a run passes one of the given statement counts. Used as a
+    context manager around run():
+
+        with HeapWatcher(interpreter, [1000, 50000]) as watcher:
+            interpreter.run(program)
+        snapshots = watcher.snapshots + [heap_snapshot(interpreter)]
+
+    Snapshots are taken at the interpreter's check_budget points (loop back-edges and method
+    entries), so each lands on the first such point at or after its statement count. While
+    active, the watcher keeps interpreter.call_stack so that method frames are visible.
+    """
+
+    def __init__(self, interpreter, at):
+        self.interpreter = interpreter
+        self.pending = sorted(at)
+        self.snapshots = []
+        self.owns_call_stack = False
+
+    def __enter__(self):
+        interpreter = self.interpreter
+        if interpreter.call_stack is None:
+            interpreter.call_stack = []
+            self.owns_call_stack = True
+        check_budget = interpreter.check_budget
+
+        def watching_check_budget():
+            while self.pending and interpreter.steps >= self.pending[0]:
+                self.pending.pop(0)
+                self.snapshots.append(heap_snapshot(interpreter))
+            check_budget()
+
+        interpreter.check_budget = watching_check_budget
+        return self
+
+    def __exit__(self, *exc_info):
+        del self.interpreter.check_budget
+        if self.owns_call_stack:
+            self.interpreter.call_stack = None
+            self.owns_call_stack = False
+        return False
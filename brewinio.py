@@ -0,0 +1,197 @@
+"""
+Pluggable destinations for Brewin program output and sources for its input; InterpreterBase.output
+hands every printed line to an OutputSink, and InterpreterBase.get_input can read from an InputSource.
+"""
+
+import hashlib
+import mmap
+import os
+import sys
+from abc import ABC, abstractmethod
+from collections import deque
+
+
+class OutputSink(ABC):
+    """Base class for output sinks; subclasses implement write and whichever other hooks they need."""
+
+    @abstractmethod
+    def write(self, line):
+        """Accept one line of program output (without its trailing newline)."""
+
+    def flush(self):
+        """Push anything still buffered to its destination; called at program end and on error."""
+
+    def reset(self):
+        """Forget everything recorded so far, ready for another run."""
+
+    def get_output(self):
+        """Return the lines this sink still holds (empty for sinks that keep none)."""
+        return []
+
+
+class MemorySink(OutputSink):
+    """Default sink: keeps every line in memory and optionally echoes it to stdout."""
+
+    def __init__(self, console_output=True):
+        self.console_output = console_output
+        self.lines = []
+
+    def write(self, line):
+        if self.console_output:
+            print(line)
+        self.lines.append(line)
+
+    def reset(self):
+        self.lines = []
+
+    def get_output(self):
+        return self.lines
+
+
+class BufferedWriterSink(OutputSink):
+    """
+    Block-buffers lines and writes them in large chunks to a file descriptor or text file
+    object (stdout by default). Nothing is retained once it has been written.
+    """
+
+    def __init__(self, target=None, buffer_size=1 << 16):
+        self.target = sys.stdout if target is None else target
+        self.buffer_size = buffer_size
+        self.pending = []
+        self.pending_size = 0
+        self.line_count = 0
+
+    def write(self, line):
+        self.pending.append(line)
+        self.pending_size += len(line) + 1
+        self.line_count += 1
+        if self.pending_size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        chunk = "\n".join(self.pending) + "\n"
+        self.pending = []
+        self.pending_size = 0
+        if isinstance(self.target, int):
+            data = chunk.encode("utf-8")
+            while data:
+                data = data[os.write(self.target, data) :]
+        else:
+            self.target.write(chunk)
+            self.target.flush()
+
+    def reset(self):
+        self.pending = []
+        self.pending_size = 0
+        self.line_count = 0
+
+
+class RingBufferSink(OutputSink):
+    """Keeps only the most recent `capacity` lines, so memory stays bounded on long runs."""
+
+    def __init__(self, capacity=1000):
+        self.lines = deque(maxlen=capacity)
+        self.line_count = 0
+
+    def write(self, line):
+        self.lines.append(line)
+        self.line_count += 1
+
+    def reset(self):
+        self.lines.clear()
+        self.line_count = 0
+
+    def get_output(self):
+        return list(self.lines)
+
+
+class HashingSink(OutputSink):
+    """Keeps only a running digest of the output and how many lines went into it."""
+
+    def __init__(self, algorithm="sha256"):
+        self.algorithm = algorithm
+        self.digest = hashlib.new(algorithm)
+        self.line_count = 0
+
+    def write(self, line):
+        self.digest.update(line.encode("utf-8"))
+        self.digest.update(b"\n")
+        self.line_count += 1
+
+    def reset(self):
+        self.digest = hashlib.new(self.algorithm)
+        self.line_count = 0
+
+    def hexdigest(self):
+        """Digest of every line written so far, each terminated by a newline."""
+        return self.digest.hexdigest()
+
+
+class InputSource(ABC):
+    """
+    Base class for lazily-read program input; InterpreterBase.get_input asks for one line per
+    inputi/inputs, so only the current line is ever decoded.
+    """
+
+    @abstractmethod
+    def read_line(self):
+        """Return the next line without its trailing newline, or None once input is exhausted."""
+
+    def rewind(self):
+        """Start again from the first line, ready for another run."""
+
+    def close(self):
+        """Release whatever the source holds open."""
+
+
+class StreamInputSource(InputSource):
+    """Reads lines on demand from a buffered text stream (e.g. an open file)."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def read_line(self):
+        line = self.stream.readline()
+        if not line:
+            return None
+        return line.rstrip("\n")
+
+    def rewind(self):
+        self.stream.seek(0)
+
+    def close(self):
+        self.stream.close()
+
+
+class MmapInputSource(InputSource):
+    """Memory-maps an input file and slices/decodes one line at a time from the mapping."""
+
+    def __init__(self, path):
+        with open(path, "rb") as handle:
+            empty = os.fstat(handle.fileno()).st_size == 0
+            # mmap refuses zero-length files; an empty file simply has no lines
+            self.mapping = (
+                None if empty else mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            )
+        self.offset = 0
+
+    def read_line(self):
+        if self.mapping is None or self.offset >= len(self.mapping):
+            return None
+        end = self.mapping.find(b"\n", self.offset)
+        next_offset = end + 1
+        if end == -1:
+            end = next_offset = len(self.mapping)
+        line = self.mapping[self.offset : end].decode("utf-8")
+        self.offset = next_offset
+        return line
+
+    def rewind(self):
+        self.offset = 0
+
+    def close(self):
+        if self.mapping is not None:
+            self.mapping.close()
+            self.mapping = None
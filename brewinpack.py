@@ -0,0 +1,123 @@
+"""
+Packs a Brewin test corpus (a directory of .brewin/.in/.exp files) into a single archive with an
+offset index, and reads test files back out of a memory-mapped archive; is entry-point for
+packing corpora.
+
+Archive layout: MAGIC, the index length as an 8-byte little-endian integer, the JSON index, then
+every file's bytes back to back. The index maps each test's name (its path relative to the packed
+directory, without the extension) to {"brewin": [offset, length], "in": ..., "exp": ...}, with
+offsets counted from the end of the index and null for a file the test doesn't have.
+"""
+
+import argparse
+import io
+import json
+import mmap
+import os
+import struct
+from glob import glob
+
+MAGIC = b"BRWPACK1"
+LENGTH = struct.Struct("<Q")
+KINDS = ("brewin", "in", "exp")
+
+
+def pack_corpus(directory, archive_path):
+    """Pack every .brewin under directory that has a matching .exp; returns the test count."""
+    index = {}
+    blobs = []
+    offset = 0
+    for srcfile in sorted(glob(os.path.join(directory, "**", "*.brewin"), recursive=True)):
+        base = srcfile[: -len(".brewin")]
+        if not os.path.exists(f"{base}.exp"):
+            continue
+        name = os.path.relpath(base, directory).replace(os.sep, "/")
+        entry = {}
+        for kind in KINDS:
+            path = f"{base}.{kind}"
+            if not os.path.exists(path):
+                entry[kind] = None
+                continue
+            with open(path, "rb") as handle:
+                data = handle.read()
+            entry[kind] = [offset, len(data)]
+            blobs.append(data)
+            offset += len(data)
+        index[name] = entry
+
+    encoded_index = json.dumps(index, sort_keys=True).encode("utf-8")
+    with open(archive_path, "wb") as handle:
+        handle.write(MAGIC)
+        handle.write(LENGTH.pack(len(encoded_index)))
+        handle.write(encoded_index)
+        for data in blobs:
+            handle.write(data)
+    return len(index)
+
+
+class CorpusArchive:
+    """A memory-mapped archive written by pack_corpus; files are sliced out of the mapping."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as handle:
+            self.mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mapping[: len(MAGIC)] != MAGIC:
+            self.mapping.close()
+            raise ValueError(f"{path} is not a Brewin corpus archive")
+        (index_length,) = LENGTH.unpack_from(self.mapping, len(MAGIC))
+        index_start = len(MAGIC) + LENGTH.size
+        self.index = json.loads(self.mapping[index_start : index_start + index_length])
+        self.data_start = index_start + index_length
+
+    def names(self):
+        """Names of every packed test, sorted."""
+        return sorted(self.index)
+
+    def read(self, name, kind):
+        """The raw bytes of one of a test's files (kind is brewin, in or exp); None if absent."""
+        span = self.index[name][kind]
+        if span is None:
+            return None
+        start = self.data_start + span[0]
+        return self.mapping[start : start + span[1]]
+
+    def read_lines(self, name, kind):
+        """
+        A test's file as lines with their newlines, as readlines() on the file opened in text
+        mode would give them; None if absent.
+        """
+        data = self.read(name, kind)
+        if data is None:
+            return None
+        return io.StringIO(data.decode("utf-8"), newline=None).readlines()
+
+    def close(self):
+        """Unmap the archive."""
+        self.mapping.close()
+
+
+def main():
+    """main entrypoint: packs a corpus directory, or lists what an archive holds"""
+    parser = argparse.ArgumentParser(description="Pack Brewin test corpora into one file.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack = commands.add_parser("pack", help="pack a directory (e.g. v2) into an archive")
+    pack.add_argument("directory")
+    pack.add_argument("archive")
+    listing = commands.add_parser("list", help="list the tests in an archive")
+    listing.add_argument("archive")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        count = pack_corpus(args.directory, args.archive)
+        print(f"Packed {count} tests from {args.directory} into {args.archive}")
+        return
+    archive = CorpusArchive(args.archive)
+    for name in archive.names():
+        kinds = [kind for kind in KINDS if archive.index[name][kind] is not None]
+        print(f"{name} ({', '.join(kinds)})")
+    archive.close()
+
+
+if __name__ == "__main__":
+    main()
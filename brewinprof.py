@@ -0,0 +1,242 @@
+"""
+Profilers that measure where a Brewin program spends its time in Brewin terms (methods, source
+lines) rather than in the interpreter's own Python functions.
+"""
+
+import json
+import signal
+import time
+
+
+class MethodProfiler:
+    """
+    Call count, self time and cumulative time per Brewin method, keyed "Class.method(types)"
+    by the class that defines the method. The interpreter calls enter() before running a method
+    body and exit() after it, even when an exception unwinds through it. Like cProfile, a
+    recursive method's cumulative time counts only its outermost active call.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.stats = {}  # key -> [calls, self time, cumulative time]
+        self.stack = []  # [key, start time, time spent in callees]
+        self.active = {}  # key -> number of its calls on the stack
+        self.keys = {}  # (class name, method id) -> key, so keys are built once per method
+
+    def enter(self, class_name, method):
+        """Start timing a call of method, as defined by class_name."""
+        cache_key = (class_name, id(method))
+        key = self.keys.get(cache_key)
+        if key is None:
+            key = f"{class_name}.{method.name}({', '.join(map(str, method.parameter_types))})"
+            self.keys[cache_key] = key
+        self.active[key] = self.active.get(key, 0) + 1
+        self.stack.append([key, self.clock(), 0.0])
+
+    def exit(self):
+        """Stop timing the innermost call and charge it to its method."""
+        key, start, callee_time = self.stack.pop()
+        elapsed = self.clock() - start
+        entry = self.stats.get(key)
+        if entry is None:
+            entry = self.stats[key] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += elapsed - callee_time
+        self.active[key] -= 1
+        if not self.active[key]:
+            entry[2] += elapsed
+        if self.stack:
+            self.stack[-1][2] += elapsed
+
+    def rows(self, sort="cumulative"):
+        """One dict per method (method, calls, self, cumulative), largest `sort` value first."""
+        rows = [
+            {"method": key, "calls": calls, "self": self_time, "cumulative": cumulative}
+            for key, (calls, self_time, cumulative) in self.stats.items()
+        ]
+        rows.sort(key=lambda row: (-row[sort], row["method"]))
+        return rows
+
+    def format_table(self, sort="cumulative", limit=None):
+        """The rows as a text table, times in milliseconds."""
+        lines = [f"{'calls':>8} {'self ms':>10} {'cum ms':>10}  method"]
+        for row in self.rows(sort)[:limit]:
+            lines.append(
+                f"{row['calls']:>8} {row['self'] * 1000:10.3f} "
+                f"{row['cumulative'] * 1000:10.3f}  {row['method']}"
+            )
+        return "\n".join(lines)
+
+    def to_json(self, sort="cumulative"):
+        """The rows as a JSON string, times in seconds."""
+        return json.dumps(self.rows(sort), indent=2)
+
+
+class LineProfiler:
+    """
+    Statement and expression execution counts and self time per Brewin source line, taken from
+    the parser's line numbers. The evaluator calls enter() as it starts executing a statement or
+    evaluating an expression and exit() when it is done; time spent in nested statements and
+    expressions is charged to their own lines, so the per-line times add up to the run's.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.stats = {}  # 0-based line (None if unknown) -> [statements, expressions, self time]
+        self.stack = []  # [stats entry, start time, time spent in nested nodes]
+
+    def enter(self, node, is_statement):
+        """Start timing a statement or expression node (a parsed list, or a single token)."""
+        token = node[0] if isinstance(node, list) and node else node
+        line = getattr(token, "line_num", None)
+        entry = self.stats.get(line)
+        if entry is None:
+            entry = self.stats[line] = [0, 0, 0.0]
+        entry[0 if is_statement else 1] += 1
+        self.stack.append([entry, self.clock(), 0.0])
+
+    def attach(self, instance):
+        """
+        Shadow a ClassInstance's statement and expression evaluators (its name-mangled
+        __execute_statement and __execute_expression) with wrappers that time every node, so
+        runs without a line profiler pay nothing for it.
+        """
+        # pylint: disable=protected-access
+        execute_statement = instance._ClassInstance__execute_statement
+        execute_expression = instance._ClassInstance__execute_expression
+
+        def profiled_statement(method_body, *args):
+            self.enter(method_body, True)
+            try:
+                return execute_statement(method_body, *args)
+            finally:
+                self.exit()
+
+        def profiled_expression(expression, *args):
+            self.enter(expression, False)
+            try:
+                return execute_expression(expression, *args)
+            finally:
+                self.exit()
+
+        instance._ClassInstance__execute_statement = profiled_statement
+        instance._ClassInstance__execute_expression = profiled_expression
+
+    def exit(self):
+        """Stop timing the innermost node and charge its self time to its line."""
+        entry, start, nested_time = self.stack.pop()
+        elapsed = self.clock() - start
+        entry[2] += elapsed - nested_time
+        if self.stack:
+            self.stack[-1][2] += elapsed
+
+    def rows(self):
+        """One dict per line that ran (line is 1-based, or None), hottest first."""
+        rows = [
+            {
+                "line": None if line is None else line + 1,
+                "statements": statements,
+                "expressions": expressions,
+                "time": seconds,
+            }
+            for line, (statements, expressions, seconds) in self.stats.items()
+        ]
+        rows.sort(key=lambda row: -row["time"])
+        return rows
+
+    def annotate(self, program):
+        """
+        The program's source (a list of lines) with each line's statement and expression counts,
+        time in milliseconds and share of the total time in front of it.
+        """
+        total = sum(entry[2] for entry in self.stats.values()) or 1.0
+        lines = [f"{'stmts':>8} {'exprs':>8} {'ms':>10} {'%':>6}  source"]
+        for line, text in enumerate(program):
+            text = text.rstrip("\n")
+            entry = self.stats.get(line)
+            if entry is None:
+                lines.append(f"{'':>8} {'':>8} {'':>10} {'':>6}  {text}")
+                continue
+            statements, expressions, seconds = entry
+            lines.append(
+                f"{statements:>8} {expressions:>8} {seconds * 1000:10.3f} "
+                f"{seconds / total * 100:6.1f}  {text}"
+            )
+        return "\n".join(lines)
+
+    def to_json(self):
+        """The rows as a JSON string, times in seconds."""
+        return json.dumps(self.rows(), indent=2)
+
+
+class SamplingProfiler:
+    """
+    Samples the interpreter's shadow Brewin call stack (interpreter.call_stack) on a
+    signal.setitimer timer and counts how often each stack was seen, for long runs where
+    instrumenting every call costs too much. Used as a context manager around run():
+
+        with SamplingProfiler(interpreter) as sampler:
+            interpreter.run(program)
+        sampler.write_folded("out.folded")
+
+    The timer is ITIMER_PROF (process CPU time) and delivers SIGPROF, so it must be entered on
+    the main thread, on a platform that has both.
+    """
+
+    def __init__(self, interpreter, interval=0.001, lines=True):
+        self.interpreter = interpreter
+        self.interval = interval
+        self.lines = lines  # label frames Class.method:line rather than Class.method
+        self.samples = {}  # tuple of frame labels, outermost first -> samples
+        self.idle = 0  # samples taken while no Brewin method was running
+        self.owns_call_stack = False
+        self.previous_handler = None
+
+    def __enter__(self):
+        if self.interpreter.call_stack is None:
+            self.interpreter.call_stack = []
+            self.owns_call_stack = True
+        self.previous_handler = signal.signal(signal.SIGPROF, self.sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        return self
+
+    def __exit__(self, *exc_info):
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self.previous_handler)
+        if self.owns_call_stack:
+            self.interpreter.call_stack = None
+            self.owns_call_stack = False
+        return False
+
+    def sample(self, signum, frame):  # pylint: disable=unused-argument
+        """The SIGPROF handler: count the current shadow stack."""
+        call_stack = self.interpreter.call_stack
+        if not call_stack:
+            self.idle += 1
+            return
+        key = tuple(self.label(entry[0], entry[1], entry[2]) for entry in call_stack)
+        self.samples[key] = self.samples.get(key, 0) + 1
+
+    def label(self, class_name, method, token):
+        """A frame's name in the folded output."""
+        line = getattr(token, "line_num", None)
+        if not self.lines or line is None:
+            return f"{class_name}.{method}"
+        return f"{class_name}.{method}:{line + 1}"
+
+    def total(self):
+        """Samples taken inside Brewin methods."""
+        return sum(self.samples.values())
+
+    def folded(self):
+        """
+        The samples in the folded-stack format flame graph tools read: one "outer;...;inner count"
+        line per distinct stack, in sorted order.
+        """
+        lines = [f"{';'.join(stack)} {count}" for stack, count in self.samples.items()]
+        return "\n".join(sorted(lines))
+
+    def write_folded(self, path):
+        """Write folded() (newline-terminated) to path."""
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(self.folded() + "\n")
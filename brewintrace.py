@@ -0,0 +1,99 @@
+"""
+A fixed-size ring buffer of the last statements an interpreter executed, for post-mortem debugging
+of runs that fail; InterpreterBase.error dumps it when a run reports an error.
+"""
+
+import sys
+
+DEFAULT_TRACE_SIZE = 64
+SUMMARY_LENGTH = 40
+
+
+def summarize(value):
+    """A short, single-line description of a recorded Brewin value (None if there is none)."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        text = value.replace("\n", "\\n")
+        return text if len(text) <= SUMMARY_LENGTH else text[: SUMMARY_LENGTH - 3] + "..."
+    return f"<{getattr(value, 'name', type(value).__name__)} object>"
+
+
+class ExecutionTrace:
+    """
+    Remembers the last `size` statements executed: the method running them, the statement's
+    operator token (which carries its source line) and, for statements that produce one, the
+    value they set, printed, returned, threw or tested. Recording overwrites the fields of one
+    preallocated entry in place and defers all formatting to dump time, so it allocates nothing
+    per statement and its memory doesn't grow with the length of the run.
+    """
+
+    def __init__(self, size=DEFAULT_TRACE_SIZE, stream=None):
+        self.size = size
+        self.stream = stream  # where dump() writes; None means sys.stderr at the time of the dump
+        self.entries = [[None, None, None] for _ in range(size)]  # [frame, token, value]
+        self.count = 0  # statements recorded since the last clear()
+
+    def clear(self):
+        """Forget everything recorded (e.g. before the interpreter runs another program)."""
+        for entry in self.entries:
+            entry[0] = entry[1] = entry[2] = None
+        self.count = 0
+
+    def record(self, token, frame):
+        """
+        Record a statement by its operator token and the interpreter's call_stack frame running it
+        (or None). Returns the statement's step, which the caller passes to set_value once the
+        statement has produced its value.
+        """
+        step = self.count
+        entry = self.entries[step % self.size]
+        entry[0] = frame
+        entry[1] = token
+        entry[2] = None
+        self.count = step + 1
+        return step
+
+    def set_value(self, step, value):
+        """
+        Attach the value a recorded statement produced, unless the statements it ran in between
+        (e.g. a method call in its expression) have already reused its entry.
+        """
+        if self.count - step <= self.size:
+            self.entries[step % self.size][2] = value
+
+    def rows(self):
+        """The recorded statements, oldest first, as dicts (step, method, line, operator, value)."""
+        rows = []
+        for step in range(max(0, self.count - self.size), self.count):
+            frame, token, value = self.entries[step % self.size]
+            line = getattr(token, "line_num", None)
+            rows.append(
+                {
+                    "step": step + 1,
+                    "method": "" if frame is None else f"{frame[0]}.{frame[1]}",
+                    "line": None if line is None else line + 1,
+                    "operator": str(token),
+                    "value": summarize(value),
+                }
+            )
+        return rows
+
+    def format(self):
+        """The recorded statements as text, oldest first."""
+        rows = self.rows()
+        if not rows:
+            return "(no statements executed)"
+        lines = []
+        for row in rows:
+            line = "?" if row["line"] is None else row["line"]
+            text = f"{row['step']:>8}  line {line:<5} {row['method']:<24} {row['operator']:<8}"
+            lines.append(f"{text} {row['value']}".rstrip())
+        return "\n".join(lines)
+
+    def dump(self, header=None):
+        """Write the trace (after an optional header line) to the trace's stream."""
+        stream = self.stream if self.stream is not None else sys.stderr
+        shown = min(self.count, self.size)
+        print(header or "Execution trace", f"(last {shown} of {self.count} statements):", file=stream)
+        print(self.format(), file=stream)
@@ -99,6 +99,8 @@ class ClassInstance:
             self.methods[key] = (value.parameters, value.body)
 
     def run_method(self, method, arguments=[]):
+        self.interpreter.check_budget()
+
         if method not in self.methods.keys():
             self.interpreter.error(ErrorType.NAME_ERROR)
 
@@ -113,10 +115,12 @@ class ClassInstance:
         for i in range(0, len(arguments)):
             argument_binding[method_parameters[i]] = arguments[i]
 
-        return self.__execute_statement(method_body, argument_binding)
+        return self.interpreter.call_in_frame(self, method, [argument_binding], self.__execute_statement, method_body, argument_binding)
 
         
     def __execute_statement(self, method_body, argument_binding):
+        trace_step = self.interpreter.begin_statement(method_body[0])
+
         if method_body[0] == InterpreterBase.PRINT_DEF:
             value_to_be_printed = ""
 
@@ -124,11 +128,17 @@ class ClassInstance:
                 value_to_be_printed += self.__execute_expression(expression, argument_binding).value.replace('"', "")
             
             self.interpreter.output(value_to_be_printed)
+
+            if trace_step is not None:
+                self.interpreter.trace.set_value(trace_step, value_to_be_printed)
         
         elif method_body[0] == InterpreterBase.SET_DEF:
             variable_name = method_body[1]
             value = self.__execute_expression(method_body[2], argument_binding)
 
+            if trace_step is not None:
+                self.interpreter.trace.set_value(trace_step, value.value)
+
             if variable_name in argument_binding.keys():
                 argument_binding[variable_name] = value
             elif variable_name in self.fields.keys():
@@ -149,6 +159,9 @@ class ClassInstance:
 
             expression_value = self.__execute_expression(expression, argument_binding)
 
+            if trace_step is not None:
+                self.interpreter.trace.set_value(trace_step, expression_value.value)
+
             if expression_value.type != Type.BOOLEAN:
                 self.interpreter.error(ErrorType.TYPE_ERROR)
             elif expression_value.value == InterpreterBase.TRUE_DEF:
@@ -167,6 +180,7 @@ class ClassInstance:
 
             while expression_value.value == InterpreterBase.TRUE_DEF:
                 return_value = self.__execute_statement(statement, argument_binding)
+                self.interpreter.check_budget()
                 
                 expression_value = self.__execute_expression(expression, argument_binding)
                 if expression_value.type != Type.BOOLEAN:
@@ -201,6 +215,9 @@ class ClassInstance:
                 expression = method_body[1]
                 expression_value = self.__execute_expression(expression, argument_binding)
 
+                if trace_step is not None:
+                    self.interpreter.trace.set_value(trace_step, expression_value.value)
+
             return expression_value
 
         else:
@@ -208,6 +225,9 @@ class ClassInstance:
 
     # Call on one expression at a time
     def __execute_expression(self, expression, argument_binding):
+        if isinstance(expression, list):
+            self.interpreter.stats.count_expression(expression[0])
+
         expression_type = Type.type(expression)
 
         if expression_type is not None:
@@ -373,6 +393,8 @@ class ClassInstance:
 
             class_type = self.interpreter.classes[class_name]
 
+            self.interpreter.stats.count_object(class_name)
+
             return Value(Type.OBJECT, ClassInstance(self.interpreter, class_type.name, class_type))
 
         elif expression[0] == InterpreterBase.CALL_DEF:
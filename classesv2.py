@@ -188,11 +188,16 @@ class ClassInstance:
             self.me.append(self)
 
             self.override_stack.append((self.fields, self.methods, self))
+
+            if interpreter.line_profiler is not None:
+                interpreter.line_profiler.attach(self)
         else:
             self.type = Type.NULL
             self.name = Type.NULL
 
     def run_method(self, environment_stack, method, arguments=[]):
+        self.interpreter.check_budget()
+
         method_body = method.body
         method_parameters = method.parameters
         method_type = Type.string_to_type(method.type)
@@ -213,8 +218,7 @@ class ClassInstance:
 
         environment_stack.append(argument_binding)
 
-        return_value = self.__execute_statement(method_body, environment_stack, method_type)
-
+        return_value = self.interpreter.call_in_frame(self, method.name, environment_stack, self.__execute_statement, method_body, environment_stack, method_type)
         environment_stack.pop()
 
         if (method_type != Type.RETURN_NULL and (return_value is None or return_value.type == Type.RETURN_NULL)):
@@ -262,6 +266,8 @@ class ClassInstance:
             return Value(InterpreterBase.NULL_DEF)
         
     def __execute_statement(self, method_body, environment_stack, method_type=Type.RETURN_NULL):
+        trace_step = self.interpreter.begin_statement(method_body[0])
+
         if method_body[0] == InterpreterBase.PRINT_DEF:
             value_to_be_printed = ""
 
@@ -269,6 +275,9 @@ class ClassInstance:
                 value_to_be_printed += self.__execute_expression(expression, environment_stack)[0].value.replace('"', "")
             
             self.interpreter.output(value_to_be_printed)
+
+            if trace_step is not None:
+                self.interpreter.trace.set_value(trace_step, value_to_be_printed)
         
         elif method_body[0] == InterpreterBase.SET_DEF:
             variable_name = method_body[1]
@@ -286,6 +295,9 @@ class ClassInstance:
 
             variable.assign(value)
 
+            if trace_step is not None:
+                self.interpreter.trace.set_value(trace_step, value.value)
+
         elif method_body[0] == InterpreterBase.LET_DEF:
             variable_declarations = method_body[1]
             statement_body = method_body[2:]
@@ -305,6 +317,8 @@ class ClassInstance:
 
             environment_stack.append(variable_bindings)
 
+            self.interpreter.stats.note_environment_depth(len(environment_stack))
+
             new_method_body = [InterpreterBase.BEGIN_DEF]
             new_method_body.extend(statement_body)
 
@@ -327,6 +341,9 @@ class ClassInstance:
 
             expression_value, _ = self.__execute_expression(expression, environment_stack)
 
+            if trace_step is not None:
+                self.interpreter.trace.set_value(trace_step, expression_value.value)
+
             if expression_value.type != Type.BOOLEAN:
                 self.interpreter.error(ErrorType.TYPE_ERROR)
             elif expression_value.value == InterpreterBase.TRUE_DEF:
@@ -345,6 +362,7 @@ class ClassInstance:
 
             while expression_value.value == InterpreterBase.TRUE_DEF:
                 return_value = self.__execute_statement(statement, environment_stack)
+                self.interpreter.check_budget()
                 
                 expression_value, _ = self.__execute_expression(expression, environment_stack)
                 if expression_value.type != Type.BOOLEAN:
@@ -385,6 +403,9 @@ class ClassInstance:
             if expression_value.type == Type.NULL and expression_value.null_type == None:
                 expression_value.null_type = method_type
 
+            if trace_step is not None:
+                self.interpreter.trace.set_value(trace_step, expression_value.value)
+
             return expression_value
 
         else:
@@ -392,6 +413,9 @@ class ClassInstance:
 
     # Call on one expression at a time
     def __execute_expression(self, expression, environment_stack, variable_type=None):
+        if isinstance(expression, list):
+            self.interpreter.stats.count_expression(expression[0])
+
         expression_type = Type.type(expression)
 
         if expression_type is not None:
@@ -559,6 +583,8 @@ class ClassInstance:
 
             class_type = self.interpreter.classes[class_name]
 
+            self.interpreter.stats.count_object(class_name)
+
             return Value(ClassInstance(self.interpreter, class_type.name, class_type)), Type.NOT_A_VARIABLE
 
         elif expression[0] == InterpreterBase.CALL_DEF:
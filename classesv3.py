@@ -52,17 +52,31 @@ class Type(Enum):
         return type
 
 class Value:
-    def __init__(self, value, returned_nothing=False, null_type=None, exception=False):
+    def __init__(self, value, returned_nothing=False, null_type=None):
         if returned_nothing:
             self.type = Type.RETURN_NULL
-        elif exception:
-            self.type = Type.EXCEPTION
         else: 
             self.type = Type.type(value)
             if self.type == Type.NULL:
                 self.null_type = null_type
             self.value = value
 
+    # Builds a value whose type the caller already knows, skipping Type.type's parsing
+    def of_type(value, type):
+        typed_value = Value.__new__(Value)
+        typed_value.type = type
+        typed_value.value = value
+        return typed_value
+
+    def of_bool(condition):
+        return Value.of_type(InterpreterBase.TRUE_DEF if condition else InterpreterBase.FALSE_DEF, Type.BOOLEAN)
+
+class BrewinException(Exception):
+    # Raised by a Brewin throw and unwound natively to the nearest enclosing try, so code that never throws pays nothing
+    def __init__(self, value : Value):
+        super().__init__(value.value)
+        self.value = value
+
 class Variable:
     def __init__(self, type : str, name : str, value : Value, interpreter):
         self.type = Type.string_to_type(type)
@@ -87,12 +101,51 @@ class Variable:
         else:
             self.interpreter.error(ErrorType.TYPE_ERROR)
 
+    # Builds a variable whose type was already resolved, e.g. by a compiled let scope
+    def from_slot(variable_type, name : str, value : Value, interpreter):
+        variable = Variable.__new__(Variable)
+        variable.type = variable_type
+        variable.name = name
+        variable.interpreter = interpreter
+        variable.assign(value)
+        return variable
+
     def get_value(self):
         return self.value.value
 
     def print(self):
         print(f"Variable {self.name} equals {self.value.value} of type {self.type}")
 
+class LetScope:
+    # A let statement compiled once: slot names in declaration order, their resolved types, initializers and defaults
+    def __init__(self, let_statement, interpreter):
+        self.let_statement = let_statement
+        self.body = let_statement[2:]
+        self.slots = []
+
+        names = []
+
+        for variable_declaration in let_statement[1]:
+            type = variable_declaration[0]
+            name = variable_declaration[1]
+
+            if name in names:
+                interpreter.error(ErrorType.NAME_ERROR)
+
+            names.append(name)
+
+            if type not in interpreter.types:
+                interpreter.create_parameterized_class(type)
+
+            variable_type = Type.string_to_type(type)
+            initializer = variable_declaration[2] if len(variable_declaration) == 3 else None
+            default_value = None
+
+            if initializer is None and not isinstance(variable_type, str):
+                default_value = ClassInstance.get_default_return_value(variable_type)
+
+            self.slots.append((name, variable_type, initializer, default_value))
+
 class ClassField:
     # Pass in the list without the "field" part
     def __init__(self, declaration_list, interpreter):
@@ -250,11 +303,16 @@ class ClassInstance:
             self.me.append(self)
 
             self.override_stack.append((self.fields, self.methods, self))
+
+            if interpreter.line_profiler is not None:
+                interpreter.line_profiler.attach(self)
         else:
             self.type = Type.NULL
             self.name = Type.NULL
 
     def run_method(self, environment_stack, method, arguments=[]):
+        self.interpreter.check_budget()
+
         method_body = method.body
         method_parameters = method.parameters
         method_type = Type.string_to_type(method.type)
@@ -275,14 +333,13 @@ class ClassInstance:
 
         environment_stack.append(argument_binding)
 
-        return_value = self.__execute_statement(method_body, environment_stack, method_type)
-
+        return_value = self.interpreter.call_in_frame(self, method.name, environment_stack, self.__execute_statement, method_body, environment_stack, method_type)
         environment_stack.pop()
 
         if (method_type != Type.RETURN_NULL and (return_value is None or return_value.type == Type.RETURN_NULL)):
             return_value = ClassInstance.get_default_return_value(method_type)
 
-        if (return_value is not None and return_value.type is not Type.EXCEPTION and 
+        if (return_value is not None and
             (
                 (
                     (method_type != return_value.type) and not 
@@ -323,69 +380,73 @@ class ClassInstance:
         else:
             return Value(InterpreterBase.NULL_DEF)
         
-    def __execute_statement(self, method_body, environment_stack, method_type=Type.RETURN_NULL, exception_accessible=False):
+    def __execute_statement(self, method_body, environment_stack, method_type=Type.RETURN_NULL):
+        trace_step = self.interpreter.begin_statement(method_body[0])
+
         if method_body[0] == InterpreterBase.PRINT_DEF:
             value_to_be_printed = ""
 
             for expression in method_body[1:]:
-                evaluated_expression = self.__execute_expression(expression, environment_stack, exception_accessible=exception_accessible)[0]
-
-                if evaluated_expression.type == Type.EXCEPTION:
-                    return evaluated_expression
-                else:
-                    value_to_be_printed += evaluated_expression.value.replace('"', "")
+                evaluated_expression = self.__execute_expression(expression, environment_stack)[0]
+                value_to_be_printed += evaluated_expression.value.replace('"', "")
             
             self.interpreter.output(value_to_be_printed)
+
+            if trace_step is not None:
+                self.interpreter.trace.set_value(trace_step, value_to_be_printed)
         
         elif method_body[0] == InterpreterBase.SET_DEF:
             variable_name = method_body[1]
 
             expression = method_body[2]
 
-            variable = self.__get_variable_from_environment(environment_stack, variable_name, exception_accessible=exception_accessible)
+            variable = self.__get_variable_from_environment(environment_stack, variable_name)
 
             value = None
 
             if expression == InterpreterBase.ME_DEF:
                 value = Value(self.me[0])
             else:
-                value, _ = self.__execute_expression(expression, environment_stack, variable.type, exception_accessible=exception_accessible)
-
-            if value.type == Type.EXCEPTION:
-                return value
+                value, _ = self.__execute_expression(expression, environment_stack, variable.type)
 
             variable.assign(value)
 
-        elif method_body[0] == InterpreterBase.LET_DEF:
-            variable_declarations = method_body[1]
-            statement_body = method_body[2:]
-
-            variable_bindings = {}
-
-            for variable_declaration in variable_declarations:
-                type = variable_declaration[0]
-                name = variable_declaration[1]
-
-                if name in variable_bindings.keys():
-                    self.interpreter.error(ErrorType.NAME_ERROR)
+            if trace_step is not None:
+                self.interpreter.trace.set_value(trace_step, value.value)
 
-                value = None
+        elif method_body[0] == InterpreterBase.LET_DEF:
+            let_scope = self.interpreter.let_scopes.get(id(method_body))
 
-                if len(variable_declaration) == 3:
-                    value, _ = self.__execute_expression(variable_declaration[2], environment_stack, exception_accessible=exception_accessible)
+            if let_scope is None:
+                let_scope = LetScope(method_body, self.interpreter)
+                if not self.interpreter.reference:
+                    self.interpreter.let_scopes[id(method_body)] = let_scope
+            else:
+                self.interpreter.stats.let_scope_hits += 1
 
-                if value is not None:
-                    variable_bindings[name] = Variable(type, name, value, self.interpreter)
+            variable_bindings = {}
 
+            for name, variable_type, initializer, default_value in let_scope.slots:
+                if initializer is not None:
+                    value, _ = self.__execute_expression(initializer, environment_stack)
+                elif default_value is not None:
+                    value = default_value
                 else:
-                    variable_bindings[name] = Variable(type, name, ClassInstance.get_default_return_value(Type.string_to_type(type)), self.interpreter)
+                    # Null references get a fresh value each time since assignments retag their null_type
+                    value = Value(InterpreterBase.NULL_DEF)
+
+                variable_bindings[name] = Variable.from_slot(variable_type, name, value, self.interpreter)
 
             environment_stack.append(variable_bindings)
 
-            new_method_body = [InterpreterBase.BEGIN_DEF]
-            new_method_body.extend(statement_body)
+            self.interpreter.stats.note_environment_depth(len(environment_stack))
 
-            return_value = self.__execute_statement(new_method_body, environment_stack, exception_accessible=exception_accessible)
+            return_value = None
+
+            for line in let_scope.body:
+                return_value = self.__execute_statement(line, environment_stack)
+                if return_value is not None:
+                    break
 
             environment_stack.pop()
 
@@ -393,7 +454,7 @@ class ClassInstance:
 
         elif method_body[0] == InterpreterBase.BEGIN_DEF:
             for line in method_body[1:]:
-                return_value = self.__execute_statement(line, environment_stack, exception_accessible=exception_accessible)
+                return_value = self.__execute_statement(line, environment_stack)
                 if return_value is not None:
                     return return_value
 
@@ -402,42 +463,34 @@ class ClassInstance:
             true_statement = method_body[2]
             false_statement = None if len(method_body) == 3 else method_body[3]
 
-            expression_value, _ = self.__execute_expression(expression, environment_stack, exception_accessible=exception_accessible)
+            expression_value, _ = self.__execute_expression(expression, environment_stack)
 
-            if expression_value.type == Type.EXCEPTION:
-                return expression_value
+            if trace_step is not None:
+                self.interpreter.trace.set_value(trace_step, expression_value.value)
 
             if expression_value.type != Type.BOOLEAN:
                 self.interpreter.error(ErrorType.TYPE_ERROR)
 
             elif expression_value.value == InterpreterBase.TRUE_DEF:
-                return self.__execute_statement(true_statement, environment_stack, exception_accessible=exception_accessible)
+                return self.__execute_statement(true_statement, environment_stack)
             elif false_statement is not None:
-                return self.__execute_statement(false_statement, environment_stack, exception_accessible=exception_accessible)
+                return self.__execute_statement(false_statement, environment_stack)
 
         elif method_body[0] == InterpreterBase.WHILE_DEF:
             expression = method_body[1]
             statement = method_body[2]
             return_value = None
 
-            expression_value, _ = self.__execute_expression(expression, environment_stack, exception_accessible=exception_accessible)
-
-            if expression_value.type == Type.EXCEPTION:
-                return expression_value
+            expression_value, _ = self.__execute_expression(expression, environment_stack)
 
             if expression_value.type != Type.BOOLEAN:
                 self.interpreter.error(ErrorType.TYPE_ERROR)
 
             while expression_value.value == InterpreterBase.TRUE_DEF:
-                return_value = self.__execute_statement(statement, environment_stack, exception_accessible=exception_accessible)
+                return_value = self.__execute_statement(statement, environment_stack)
+                self.interpreter.check_budget()
 
-                if return_value is not None and return_value.type == Type.EXCEPTION:
-                    return return_value
-                
-                expression_value, _ = self.__execute_expression(expression, environment_stack, exception_accessible=exception_accessible)
-
-                if expression_value.type == Type.EXCEPTION:
-                    return expression_value
+                expression_value, _ = self.__execute_expression(expression, environment_stack)
 
                 if expression_value.type != Type.BOOLEAN:
                     self.interpreter.error(ErrorType.TYPE_ERROR)
@@ -449,7 +502,7 @@ class ClassInstance:
             integer_value = self.interpreter.get_input()
             value = Value(integer_value)
 
-            variable = self.__get_variable_from_environment(environment_stack, variable_name, exception_accessible=exception_accessible)
+            variable = self.__get_variable_from_environment(environment_stack, variable_name)
             variable.assign(value)
 
         elif method_body[0] == InterpreterBase.INPUT_STRING_DEF:
@@ -457,7 +510,7 @@ class ClassInstance:
             string_value = self.interpreter.get_input()
             value = Value('"' + string_value + '"')
 
-            variable = self.__get_variable_from_environment(environment_stack, variable_name, exception_accessible=exception_accessible)
+            variable = self.__get_variable_from_environment(environment_stack, variable_name)
             variable.assign(value)
 
         elif method_body[0] == InterpreterBase.RETURN_DEF:
@@ -469,7 +522,7 @@ class ClassInstance:
                 if (expression == "me"):
                     expression_value = Value(self.me[0])
                 else:
-                    expression_value, _ = self.__execute_expression(expression, environment_stack, exception_accessible=exception_accessible)
+                    expression_value, _ = self.__execute_expression(expression, environment_stack)
 
             if expression_value is None:
                 expression_value = ClassInstance.get_default_return_value(method_type)
@@ -477,36 +530,34 @@ class ClassInstance:
             if expression_value.type == Type.NULL and expression_value.null_type == None:
                 expression_value.null_type = method_type
 
+            if trace_step is not None:
+                self.interpreter.trace.set_value(trace_step, expression_value.value)
+
             return expression_value
 
         elif method_body[0] == InterpreterBase.TRY_DEF:
-            exception_dictionary = (
-                {InterpreterBase.EXCEPTION_VARIABLE_DEF : Variable(Type.STRING, InterpreterBase.EXCEPTION_VARIABLE_DEF, Value('""'), self.interpreter)}
-            )
+            # The handler frame only remembers how deep the environment stack was, so the happy path costs nothing
+            handler_depth = len(environment_stack)
+            stats = self.interpreter.stats
+            stats.tries += 1
+            call_depth = stats.call_depth
 
-            old_exception_dictionary = self.interpreter.latest_exception_dictionary
-
-            environment_stack.append(exception_dictionary)
-
-            self.interpreter.latest_exception_dictionary = exception_dictionary
+            try:
+                return self.__execute_statement(method_body[1], environment_stack, method_type)
+            except BrewinException as brewin_exception:
+                exception_variable = Variable(InterpreterBase.STRING_DEF, InterpreterBase.EXCEPTION_VARIABLE_DEF, brewin_exception.value, self.interpreter)
 
-            return_value = self.__execute_statement(method_body[1], environment_stack, method_type, exception_accessible=exception_accessible)
+            stats.catches += 1
+            stats.call_depth = call_depth
 
-            if return_value is not None and return_value.type == Type.EXCEPTION:
-                return_value = self.__execute_statement(method_body[2], environment_stack, method_type, exception_accessible=True)
+            # Drop any let scopes the throw unwound through before binding the exception for the catch block
+            del environment_stack[handler_depth:]
 
-                if return_value is not None and return_value.type == Type.EXCEPTION:
-                    exception, _ = self.__execute_expression(InterpreterBase.EXCEPTION_VARIABLE_DEF, environment_stack, exception_accessible=True)
-                    environment_stack.pop()
-                    set_exception_statement = [InterpreterBase.SET_DEF, InterpreterBase.EXCEPTION_VARIABLE_DEF, exception.value]
-                    self.__execute_statement(set_exception_statement, environment_stack, method_type, exception_accessible=True)
-                else:
-                    environment_stack.pop()
-            else:
-                environment_stack.pop()
+            environment_stack.append({InterpreterBase.EXCEPTION_VARIABLE_DEF : exception_variable})
 
+            return_value = self.__execute_statement(method_body[2], environment_stack, method_type)
 
-            self.interpreter.latest_exception_dictionary = old_exception_dictionary
+            environment_stack.pop()
 
             return return_value
 
@@ -515,307 +566,263 @@ class ClassInstance:
             if method_body[1] == InterpreterBase.ME_DEF:
                 self.interpreter.error(ErrorType.TYPE_ERROR)
 
-            variable = self.__get_variable_from_environment(environment_stack, InterpreterBase.EXCEPTION_VARIABLE_DEF, exception_accessible=True)
-            evaluated_exception, _ = self.__execute_expression(method_body[1], environment_stack, exception_accessible=exception_accessible)
+            evaluated_exception, _ = self.__execute_expression(method_body[1], environment_stack)
 
-            if evaluated_exception.type == Type.EXCEPTION:
-                return Value("null", exception=True)
+            if trace_step is not None:
+                self.interpreter.trace.set_value(trace_step, evaluated_exception.value)
 
-            variable.assign(evaluated_exception)
+            if evaluated_exception.type != Type.STRING:
+                self.interpreter.error(ErrorType.TYPE_ERROR)
 
-            return Value("null", exception=True)
+            self.interpreter.stats.throws += 1
+
+            raise BrewinException(evaluated_exception)
 
         else:
-            return_tuple = self.__execute_expression(method_body, environment_stack, exception_accessible=exception_accessible)
+            self.__execute_expression(method_body, environment_stack)
 
-            if return_tuple is not None and return_tuple[0].type == Type.EXCEPTION:
-                return return_tuple[0]
-            
 
     # Call on one expression at a time
-    def __execute_expression(self, expression, environment_stack, variable_type=None, exception_accessible=False):
-        expression_type = Type.type(expression)
+    def __execute_expression(self, expression, environment_stack, variable_type=None):
+        if isinstance(expression, list):
+            self.interpreter.stats.count_expression(expression[0])
 
-        if expression_type is not None:
+            handler = ClassInstance.EXPRESSION_HANDLERS.get(expression[0])
+
+            if handler is not None:
+                return handler(self, expression, environment_stack, variable_type)
+
+        elif Type.type(expression) is not None:
             return Value(expression), Type.NOT_A_VARIABLE
 
         elif isinstance(expression, str):
-            variable = self.__get_variable_from_environment(environment_stack, expression, exception_accessible=exception_accessible)
+            variable = self.__get_variable_from_environment(environment_stack, expression)
             return variable.value, variable.type
 
-        elif expression[0] == '+':
-            left_value, right_value, _, _ = self.__parse_binary_arguments(expression, environment_stack, exception_accessible=exception_accessible)
-
-            if ClassInstance.__check_if_exception(left_value):
-                return left_value, Type.NOT_A_VARIABLE
-
-            if ClassInstance.__check_both_numeric(left_value, right_value):
-                return Value(str(int(left_value.value) + int(right_value.value))), Type.NOT_A_VARIABLE
-
-            elif ClassInstance.__check_both_string(left_value, right_value):
-                return Value(str(left_value.value + right_value.value)), Type.NOT_A_VARIABLE
-
-            else:
-                self.interpreter.error(ErrorType.TYPE_ERROR)
-
-        elif expression[0] == '-':
-            left_value, right_value, _, _ = self.__parse_binary_arguments(expression, environment_stack, exception_accessible=exception_accessible)
-
-            if ClassInstance.__check_if_exception(left_value):
-                return left_value, Type.NOT_A_VARIABLE
-
-            if ClassInstance.__check_both_numeric(left_value, right_value):
-                return Value(str(int(left_value.value) - int(right_value.value))), Type.NOT_A_VARIABLE
-
-            else:
-                self.interpreter.error(ErrorType.TYPE_ERROR)
-
-        elif expression[0] == '*':
-            left_value, right_value, _, _ = self.__parse_binary_arguments(expression, environment_stack, exception_accessible=exception_accessible)
-
-            if ClassInstance.__check_if_exception(left_value):
-                return left_value, Type.NOT_A_VARIABLE
-
-            if ClassInstance.__check_both_numeric(left_value, right_value):
-                return Value(str(int(left_value.value) * int(right_value.value))), Type.NOT_A_VARIABLE
-
-            else:
-                self.interpreter.error(ErrorType.TYPE_ERROR)
-
-        elif expression[0] == '/':
-            left_value, right_value, _, _ = self.__parse_binary_arguments(expression, environment_stack, exception_accessible=exception_accessible)
+    def __execute_binary_operator(self, expression, environment_stack, variable_type=None):
+        left_value, left_variable_type = self.__execute_expression(expression[1], environment_stack)
+        right_value, right_variable_type = self.__execute_expression(expression[2], environment_stack)
 
-            if ClassInstance.__check_if_exception(left_value):
-                return left_value, Type.NOT_A_VARIABLE
+        # A site that only saw one primitive operand type goes straight to that type's operation
+        site = self.interpreter.operator_sites.get(id(expression))
 
-            if ClassInstance.__check_both_numeric(left_value, right_value):
-                return Value(str(int(left_value.value) // int(right_value.value))), Type.NOT_A_VARIABLE
+        if site is not None and left_value.type is site[1] and right_value.type is site[1]:
+            self.interpreter.stats.operator_site_hits += 1
+            return site[2](left_value.value, right_value.value), Type.NOT_A_VARIABLE
 
-            else:
-                self.interpreter.error(ErrorType.TYPE_ERROR)
-
-        elif expression[0] == '%':
-            left_value, right_value, _, _ = self.__parse_binary_arguments(expression, environment_stack, exception_accessible=exception_accessible)
-
-            if ClassInstance.__check_if_exception(left_value):
-                return left_value, Type.NOT_A_VARIABLE
-
-            if ClassInstance.__check_both_numeric(left_value, right_value):
-                return Value(str(int(left_value.value) % int(right_value.value))), Type.NOT_A_VARIABLE
-
-            else:
-                self.interpreter.error(ErrorType.TYPE_ERROR)
-
-        elif expression[0] == '==':
-            left_value, right_value, left_variable_type, right_variable_type = self.__parse_binary_arguments(expression, environment_stack, exception_accessible=exception_accessible)
-
-            if ClassInstance.__check_if_exception(left_value):
-                return left_value, Type.NOT_A_VARIABLE
-
-            if ClassInstance.__check_both_numeric(left_value, right_value):
-                return Value(str(int(left_value.value) == int(right_value.value)).lower()), Type.NOT_A_VARIABLE
-
-            elif (ClassInstance.__check_both_string(left_value, right_value) or 
-                ClassInstance.__check_both_bool(left_value, right_value) or 
-                self.__check_both_objects(left_value, right_value, left_variable_type, right_variable_type)):
-
-                return Value(str(left_value.value == right_value.value).lower()), Type.NOT_A_VARIABLE
-
-            else:
-                self.interpreter.error(ErrorType.TYPE_ERROR)
-
-        elif expression[0] == '!=':
-            left_value, right_value, left_variable_type, right_variable_type = self.__parse_binary_arguments(expression, environment_stack, exception_accessible=exception_accessible)
-
-            if ClassInstance.__check_if_exception(left_value):
-                return left_value, Type.NOT_A_VARIABLE
+        operations = ClassInstance.PRIMITIVE_OPERATIONS[expression[0]]
 
-            if ClassInstance.__check_both_numeric(left_value, right_value):
-                return Value(str(int(left_value.value) != int(right_value.value)).lower()), Type.NOT_A_VARIABLE
+        if left_value.type == right_value.type and left_value.type in operations:
+            operation = operations[left_value.type]
+            if not self.interpreter.reference:
+                self.interpreter.operator_sites[id(expression)] = (expression, left_value.type, operation)
+            return operation(left_value.value, right_value.value), Type.NOT_A_VARIABLE
 
-            elif (ClassInstance.__check_both_string(left_value, right_value) or 
-                ClassInstance.__check_both_bool(left_value, right_value) or 
-                self.__check_both_objects(left_value, right_value, left_variable_type, right_variable_type)):
+        if expression[0] == '==' or expression[0] == '!=':
+            if left_value.type == Type.NULL and left_value.null_type is not None:
+                left_variable_type = left_value.null_type
 
-                return Value(str(left_value.value != right_value.value).lower()), Type.NOT_A_VARIABLE
+            if right_value.type == Type.NULL and right_value.null_type is not None:
+                right_variable_type = right_value.null_type
 
-            else:
-                self.interpreter.error(ErrorType.TYPE_ERROR)
-
-        elif expression[0] == '!':
-            value, _ = self.__execute_expression(expression[1], environment_stack, exception_accessible=exception_accessible)
-
-            if ClassInstance.__check_if_exception(value):
-                return value, Type.NOT_A_VARIABLE
-
-            if value.type != Type.BOOLEAN:
-                self.interpreter.error(ErrorType.TYPE_ERROR)
-            return Value(str(value.value == InterpreterBase.FALSE_DEF).lower()), Type.NOT_A_VARIABLE
-
-        elif expression[0] == '>':
-            left_value, right_value, _, _ = self.__parse_binary_arguments(expression, environment_stack, exception_accessible=exception_accessible)
-
-            if ClassInstance.__check_if_exception(left_value):
-                return left_value, Type.NOT_A_VARIABLE
-
-            if ClassInstance.__check_both_numeric(left_value, right_value):
-                return Value(str(int(left_value.value) > int(right_value.value)).lower()), Type.NOT_A_VARIABLE
+            if self.__check_both_objects(left_value, right_value, left_variable_type, right_variable_type):
+                return Value.of_bool((left_value.value == right_value.value) == (expression[0] == '==')), Type.NOT_A_VARIABLE
 
-            elif ClassInstance.__check_both_string(left_value, right_value):
-                return Value(str(left_value.value > right_value.value).lower()), Type.NOT_A_VARIABLE
+        self.interpreter.error(ErrorType.TYPE_ERROR)
 
-            else:
-                self.interpreter.error(ErrorType.TYPE_ERROR)
-
-        elif expression[0] == '>=':
-            left_value, right_value, _, _ = self.__parse_binary_arguments(expression, environment_stack, exception_accessible=exception_accessible)
-
-            if ClassInstance.__check_if_exception(left_value):
-                return left_value, Type.NOT_A_VARIABLE
-
-            if ClassInstance.__check_both_numeric(left_value, right_value):
-                return Value(str(int(left_value.value) >= int(right_value.value)).lower()), Type.NOT_A_VARIABLE
-
-            elif ClassInstance.__check_both_string(left_value, right_value):
-                return Value(str(left_value.value >= right_value.value).lower()), Type.NOT_A_VARIABLE
-
-            else:
-                self.interpreter.error(ErrorType.TYPE_ERROR)
+    def __execute_logical_operator(self, expression, environment_stack, variable_type=None):
+        if not self.interpreter.short_circuit and (self.interpreter.reference or not self.__is_pure_operand_site(expression[2], environment_stack)):
+            return self.__execute_binary_operator(expression, environment_stack, variable_type)
 
-        elif expression[0] == '<':
-            left_value, right_value, _, _ = self.__parse_binary_arguments(expression, environment_stack, exception_accessible=exception_accessible)
+        left_value, _ = self.__execute_expression(expression[1], environment_stack)
 
-            if ClassInstance.__check_if_exception(left_value):
-                return left_value, Type.NOT_A_VARIABLE
-
-            if ClassInstance.__check_both_numeric(left_value, right_value):
-                return Value(str(int(left_value.value) < int(right_value.value)).lower()), Type.NOT_A_VARIABLE
-
-            elif ClassInstance.__check_both_string(left_value, right_value):
-                return Value(str(left_value.value < right_value.value).lower()), Type.NOT_A_VARIABLE
-
-            else:
-                self.interpreter.error(ErrorType.TYPE_ERROR)
-
-        elif expression[0] == '<=':
-            left_value, right_value, _, _ = self.__parse_binary_arguments(expression, environment_stack, exception_accessible=exception_accessible)
-
-            if ClassInstance.__check_if_exception(left_value):
-                return left_value, Type.NOT_A_VARIABLE
-
-            if ClassInstance.__check_both_numeric(left_value, right_value):
-                return Value(str(int(left_value.value) <= int(right_value.value)).lower()), Type.NOT_A_VARIABLE
-
-            elif ClassInstance.__check_both_string(left_value, right_value):
-                return Value(str(left_value.value <= right_value.value).lower()), Type.NOT_A_VARIABLE
-
-            else:
-                self.interpreter.error(ErrorType.TYPE_ERROR)
+        if left_value.type != Type.BOOLEAN:
+            self.interpreter.error(ErrorType.TYPE_ERROR)
 
-        elif expression[0] == '&':
-            left_value, right_value, _, _ = self.__parse_binary_arguments(expression, environment_stack, exception_accessible=exception_accessible)
+        # false decides an &, true decides an |
+        deciding_value = InterpreterBase.TRUE_DEF if expression[0] == '|' else InterpreterBase.FALSE_DEF
 
-            if ClassInstance.__check_if_exception(left_value):
-                return left_value, Type.NOT_A_VARIABLE
+        if left_value.value == deciding_value:
+            return Value.of_type(deciding_value, Type.BOOLEAN), Type.NOT_A_VARIABLE
 
-            if ClassInstance.__check_both_bool(left_value, right_value):
-                return Value(str(left_value.value == InterpreterBase.TRUE_DEF and right_value.value == InterpreterBase.TRUE_DEF).lower()), Type.NOT_A_VARIABLE
+        right_value, _ = self.__execute_expression(expression[2], environment_stack)
 
-            else:
-                self.interpreter.error(ErrorType.TYPE_ERROR)
-
-        elif expression[0] == '|':
-            left_value, right_value, _, _ = self.__parse_binary_arguments(expression, environment_stack, exception_accessible=exception_accessible)
+        if right_value.type != Type.BOOLEAN:
+            self.interpreter.error(ErrorType.TYPE_ERROR)
 
-            if ClassInstance.__check_if_exception(left_value):
-                return left_value, Type.NOT_A_VARIABLE
+        return Value.of_type(right_value.value, Type.BOOLEAN), Type.NOT_A_VARIABLE
 
-            if ClassInstance.__check_both_bool(left_value, right_value):
-                return Value(str(left_value.value == InterpreterBase.TRUE_DEF or right_value.value == InterpreterBase.TRUE_DEF).lower()), Type.NOT_A_VARIABLE
+    # Whether skipping this operand can never be observed; the answer is worked out once per site,
+    # from the scopes it first runs in (Brewin's scopes are lexical, so every later run sees the same declarations)
+    def __is_pure_operand_site(self, expression, environment_stack):
+        site = self.interpreter.pure_operand_sites.get(id(expression))
 
-            else:
-                self.interpreter.error(ErrorType.TYPE_ERROR)
+        if site is None:
+            site = (expression, ClassInstance.__pure_type(expression, environment_stack) == Type.BOOLEAN)
+            self.interpreter.pure_operand_sites[id(expression)] = site
+        else:
+            self.interpreter.stats.pure_operand_site_hits += 1
 
-        elif expression[0] == InterpreterBase.NEW_DEF:
-            class_name = expression[1]
+        return site[1]
 
-            if class_name not in self.interpreter.types:
-                self.interpreter.create_parameterized_class(class_name)
+    # The primitive type an operand is guaranteed to produce with no calls, no lookups that could fail
+    # and no type or division errors, or None. Names qualify when they resolve to a primitive parameter,
+    # let slot or field, since a variable's type never changes (and int variables only hold integers)
+    def __pure_type(expression, environment_stack):
+        if not isinstance(expression, list):
+            expression_type = Type.type(expression)
 
-            class_type = self.interpreter.classes[class_name]
+            if expression_type == Type.NUMBER:
+                # Type.type also accepts literals like 1.5 that int() rejects at run time
+                try:
+                    int(expression)
+                except ValueError:
+                    return None
 
-            return Value(ClassInstance(self.interpreter, class_type.name, class_type)), Type.NOT_A_VARIABLE
+            if expression_type is not None:
+                return expression_type if expression_type in ClassInstance.PURE_TYPES else None
 
-        # Fix early termination with throwing inside expressions
-        elif expression[0] == InterpreterBase.CALL_DEF:
-            method_name = expression[2]
+            for scope in reversed(environment_stack):
+                if expression in scope:
+                    variable_type = scope[expression].type
+                    return variable_type if variable_type in ClassInstance.PURE_TYPES else None
 
-            special_keyword_references = {InterpreterBase.ME_DEF : Variable(Type.type(self.me[0]), InterpreterBase.ME_DEF, Value(self.me[0]), self.interpreter)}
+            return None
 
-            if self.parent_object.name != Type.NULL:
-                special_keyword_references[InterpreterBase.SUPER_DEF] = Variable(Type.type(self.parent_object), InterpreterBase.SUPER_DEF, Value(self.parent_object), self.interpreter)
+        operator = expression[0]
+        operand_types = [ClassInstance.__pure_type(operand, environment_stack) for operand in expression[1:]]
 
-            if expression[1] == InterpreterBase.SUPER_DEF and self.parent_object.name == Type.NULL:
-                self.interpreter.error(ErrorType.TYPE_ERROR)
-            
-            environment_stack.append(special_keyword_references)
+        if None in operand_types:
+            return None
 
-            obj, _ = self.__execute_expression(expression[1], environment_stack)
+        if operator == '!':
+            return Type.BOOLEAN if operand_types == [Type.BOOLEAN] else None
 
-            environment_stack.pop()
+        if len(operand_types) != 2 or operand_types[0] != operand_types[1]:
+            return None
 
-            if obj.type == Type.NULL:
-                self.interpreter.error(ErrorType.FAULT_ERROR)
+        if operator not in ClassInstance.PRIMITIVE_OPERATIONS or operand_types[0] not in ClassInstance.PRIMITIVE_OPERATIONS[operator]:
+            return None
 
-            arguments_passed = []
-            for argument in expression[3:]:
-                evaluated_argument = self.__execute_expression(argument, environment_stack, exception_accessible=exception_accessible)[0]
+        if operator == '/' or operator == '%':
+            divisor = expression[2]
+            if isinstance(divisor, list) or Type.type(divisor) != Type.NUMBER or int(divisor) == 0:
+                return None
 
-                if evaluated_argument.type == Type.EXCEPTION:
-                    return evaluated_argument, Type.NOT_A_VARIABLE
-                else:
-                    arguments_passed.append(evaluated_argument)
+        return operand_types[0] if operator in ClassInstance.ARITHMETIC_OPERATORS else Type.BOOLEAN
 
-            return_value = self.interpreter.call_function([], obj, method_name, arguments_passed, variable_type)
+    def __execute_not(self, expression, environment_stack, variable_type=None):
+        value, _ = self.__execute_expression(expression[1], environment_stack)
 
-            if return_value is not None:
-                return return_value, Type.NOT_A_VARIABLE
+        if value.type != Type.BOOLEAN:
+            self.interpreter.error(ErrorType.TYPE_ERROR)
+        return Value.of_bool(value.value == InterpreterBase.FALSE_DEF), Type.NOT_A_VARIABLE
 
-    def __check_if_exception(left_value):
-        return_value = False
+    def __execute_new(self, expression, environment_stack, variable_type=None):
+        class_name = expression[1]
 
-        if left_value.type == Type.EXCEPTION:
-            return_value = True
+        if class_name not in self.interpreter.types:
+            self.interpreter.create_parameterized_class(class_name)
 
-        return return_value
-
-    def __parse_binary_arguments(self, expression, environment_stack, exception_accessible=False):
-        left_value, left_variable_type = self.__execute_expression(expression[1], environment_stack, exception_accessible=exception_accessible)
+        class_type = self.interpreter.classes[class_name]
 
-        if left_value.type == Type.EXCEPTION:
-            return left_value, left_value, left_variable_type, left_variable_type
+        self.interpreter.stats.count_object(class_name)
 
-        right_value, right_variable_type = self.__execute_expression(expression[2], environment_stack, exception_accessible=exception_accessible)
+        return Value(ClassInstance(self.interpreter, class_type.name, class_type)), Type.NOT_A_VARIABLE
 
-        if right_value.type == Type.EXCEPTION:
-            return right_value, right_value, right_variable_type, right_variable_type
+    def __execute_call(self, expression, environment_stack, variable_type=None):
+        method_name = expression[2]
 
-        if left_value.type == Type.NULL and left_value.null_type is not None:
-            left_variable_type = left_value.null_type
+        special_keyword_references = {InterpreterBase.ME_DEF : Variable(Type.type(self.me[0]), InterpreterBase.ME_DEF, Value(self.me[0]), self.interpreter)}
 
-        if right_value.type == Type.NULL and right_value.null_type is not None:
-            right_variable_type = right_value.null_type
+        if self.parent_object.name != Type.NULL:
+            special_keyword_references[InterpreterBase.SUPER_DEF] = Variable(Type.type(self.parent_object), InterpreterBase.SUPER_DEF, Value(self.parent_object), self.interpreter)
 
-        return left_value, right_value, left_variable_type, right_variable_type
+        if expression[1] == InterpreterBase.SUPER_DEF and self.parent_object.name == Type.NULL:
+            self.interpreter.error(ErrorType.TYPE_ERROR)
+        
+        environment_stack.append(special_keyword_references)
 
-    def __check_both_numeric(left_value, right_value):
-        return left_value.type == Type.NUMBER and right_value.type == Type.NUMBER
+        obj, _ = self.__execute_expression(expression[1], environment_stack)
 
-    def __check_both_string(left_value, right_value):
-        return left_value.type == Type.STRING and right_value.type == Type.STRING
+        environment_stack.pop()
 
-    def __check_both_bool(left_value, right_value):
-        return left_value.type == Type.BOOLEAN and right_value.type == Type.BOOLEAN
+        if obj.type == Type.NULL:
+            self.interpreter.error(ErrorType.FAULT_ERROR)
+
+        arguments_passed = []
+        for argument in expression[3:]:
+            arguments_passed.append(self.__execute_expression(argument, environment_stack)[0])
+
+        return_value = self.interpreter.call_function([], obj, method_name, arguments_passed, variable_type)
+
+        if return_value is not None:
+            return return_value, Type.NOT_A_VARIABLE
+
+    # Primitive types: operating on their values never calls a method or touches an object
+    PURE_TYPES = (Type.NUMBER, Type.STRING, Type.BOOLEAN)
+
+    # Operators of PRIMITIVE_OPERATIONS whose result has their operands' type (the rest produce a bool)
+    ARITHMETIC_OPERATORS = ('+', '-', '*', '/', '%')
+
+    # Operator -> {operand type both sides share -> operation on the raw values}
+    PRIMITIVE_OPERATIONS = {
+        '+': {
+            Type.NUMBER: lambda left, right: Value.of_type(str(int(left) + int(right)), Type.NUMBER),
+            Type.STRING: lambda left, right: Value.of_type(left + right, Type.STRING),
+        },
+        '-': {Type.NUMBER: lambda left, right: Value.of_type(str(int(left) - int(right)), Type.NUMBER)},
+        '*': {Type.NUMBER: lambda left, right: Value.of_type(str(int(left) * int(right)), Type.NUMBER)},
+        '/': {Type.NUMBER: lambda left, right: Value.of_type(str(int(left) // int(right)), Type.NUMBER)},
+        '%': {Type.NUMBER: lambda left, right: Value.of_type(str(int(left) % int(right)), Type.NUMBER)},
+        '==': {
+            Type.NUMBER: lambda left, right: Value.of_bool(int(left) == int(right)),
+            Type.STRING: lambda left, right: Value.of_bool(left == right),
+            Type.BOOLEAN: lambda left, right: Value.of_bool(left == right),
+        },
+        '!=': {
+            Type.NUMBER: lambda left, right: Value.of_bool(int(left) != int(right)),
+            Type.STRING: lambda left, right: Value.of_bool(left != right),
+            Type.BOOLEAN: lambda left, right: Value.of_bool(left != right),
+        },
+        '>': {
+            Type.NUMBER: lambda left, right: Value.of_bool(int(left) > int(right)),
+            Type.STRING: lambda left, right: Value.of_bool(left > right),
+        },
+        '>=': {
+            Type.NUMBER: lambda left, right: Value.of_bool(int(left) >= int(right)),
+            Type.STRING: lambda left, right: Value.of_bool(left >= right),
+        },
+        '<': {
+            Type.NUMBER: lambda left, right: Value.of_bool(int(left) < int(right)),
+            Type.STRING: lambda left, right: Value.of_bool(left < right),
+        },
+        '<=': {
+            Type.NUMBER: lambda left, right: Value.of_bool(int(left) <= int(right)),
+            Type.STRING: lambda left, right: Value.of_bool(left <= right),
+        },
+        '&': {Type.BOOLEAN: lambda left, right: Value.of_bool(left == InterpreterBase.TRUE_DEF and right == InterpreterBase.TRUE_DEF)},
+        '|': {Type.BOOLEAN: lambda left, right: Value.of_bool(left == InterpreterBase.TRUE_DEF or right == InterpreterBase.TRUE_DEF)},
+    }
+
+    EXPRESSION_HANDLERS = {
+        '+': __execute_binary_operator,
+        '-': __execute_binary_operator,
+        '*': __execute_binary_operator,
+        '/': __execute_binary_operator,
+        '%': __execute_binary_operator,
+        '==': __execute_binary_operator,
+        '!=': __execute_binary_operator,
+        '>': __execute_binary_operator,
+        '>=': __execute_binary_operator,
+        '<': __execute_binary_operator,
+        '<=': __execute_binary_operator,
+        '&': __execute_logical_operator,
+        '|': __execute_logical_operator,
+        '!': __execute_not,
+        InterpreterBase.NEW_DEF: __execute_new,
+        InterpreterBase.CALL_DEF: __execute_call,
+    }
 
     def __check_both_objects(self, left_value, right_value, left_variable_type, right_variable_type):
         return_value = False
@@ -831,11 +838,7 @@ class ClassInstance:
 
         return return_value
 
-    def __get_variable_from_environment(self, environment_stack, variable_name : str, exception_accessible=False):
-
-        if variable_name == InterpreterBase.EXCEPTION_VARIABLE_DEF and not exception_accessible:
-            self.interpreter.error(ErrorType.NAME_ERROR)
-
+    def __get_variable_from_environment(self, environment_stack, variable_name : str):
         environment_stack = copy(environment_stack)
 
         variable = None
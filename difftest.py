@@ -0,0 +1,186 @@
+"""
+Differential testing: runs the same Brewin programs on two interpreter engines, compares their
+output logs and reported errors, and shrinks any divergent program to a small reproducer.
+"""
+
+import importlib
+import random
+import re
+
+from bparser import BParser
+from brewingen import generate_program
+from intbase import FuelExhaustedError
+
+# keeps candidate programs that lose their loop increment during minimization from hanging
+DEFAULT_MAX_STEPS = 200_000
+
+
+class Engine:
+    """
+    An interpreter module plus the keyword options its Interpreter is built with, e.g. v3 with
+    short_circuit, or v3 as a reference walker without its node-keyed caches.
+    """
+
+    def __init__(self, module, options=None):
+        self.module = module
+        self.options = options or {}
+        # the Brewin dialect the module implements, from its interpreterv{N} name
+        match = re.search(r"(\d+)$", module.__name__)
+        self.version = int(match.group(1)) if match else None
+
+    @staticmethod
+    def parse(spec):
+        """
+        Build an Engine from MODULE[:OPTION[,OPTION...]], where each OPTION is a flag
+        (set to True) or NAME=INT, e.g. "interpreterv3:short_circuit" or "interpreterv3:reference".
+        """
+        module_name, _, option_list = spec.partition(":")
+        options = {}
+        for option in filter(None, option_list.split(",")):
+            name, has_value, value = option.partition("=")
+            options[name] = int(value) if has_value else True
+        return Engine(importlib.import_module(module_name), options)
+
+    def __str__(self):
+        flags = [name if value is True else f"{name}={value}" for name, value in self.options.items()]
+        return self.module.__name__ + (":" + ",".join(flags) if flags else "")
+
+
+def shared_version(engine_a, engine_b):
+    """The newest Brewin dialect both engines implement (None if neither names one)."""
+    versions = [engine.version for engine in (engine_a, engine_b) if engine.version is not None]
+    return min(versions) if versions else None
+
+
+def run_engine(engine, program, stdin=None, max_steps=DEFAULT_MAX_STEPS):
+    """
+    Run a program on one engine and summarize what it did as a dict: its output log, the
+    (error type, line) it reported, and `crash`, the name of any exception that wasn't a
+    reported Brewin error ("fuel" when the step budget ran out).
+    """
+    interpreter = engine.module.Interpreter(False, stdin, False, max_steps=max_steps, **engine.options)
+    crash = None
+    try:
+        interpreter.run(program)
+    except FuelExhaustedError:
+        crash = "fuel"
+    except Exception as exception:  # pylint: disable=broad-except
+        if interpreter.get_error_type_and_line()[0] is None:
+            crash = type(exception).__name__
+    error_type, error_line = interpreter.get_error_type_and_line()
+    return {
+        "output": interpreter.get_output(),
+        "error": None if error_type is None else (str(error_type), error_line),
+        "crash": crash,
+    }
+
+
+def divergence(outcome_a, outcome_b):
+    """The keys on which two run_engine outcomes differ (empty when the engines agree)."""
+    return tuple(key for key in ("output", "error", "crash") if outcome_a[key] != outcome_b[key])
+
+
+def format_program(tree):
+    """Turn a parsed program (or any node of one) back into Brewin source lines."""
+
+    def render(node):
+        if isinstance(node, list):
+            return "(" + " ".join(render(child) for child in node) + ")"
+        return str(node)
+
+    return [render(node) + "\n" for node in tree]
+
+
+def candidate_trees(tree):
+    """
+    Yield smaller variants of a parsed program: one element (never a list's head token)
+    deleted, or one list node replaced by one of its list children.
+    """
+
+    def variants(node, is_root):
+        for index in range(0 if is_root else 1, len(node)):
+            yield node[:index] + node[index + 1 :]
+        for index, child in enumerate(node):
+            if not isinstance(child, list):
+                continue
+            if not is_root:
+                for grandchild in child:
+                    if isinstance(grandchild, list):
+                        yield node[:index] + [grandchild] + node[index + 1 :]
+            for smaller in variants(child, False):
+                yield node[:index] + [smaller] + node[index + 1 :]
+
+    yield from variants(tree, True)
+
+
+def minimize(engine_a, engine_b, program, stdin=None, max_steps=DEFAULT_MAX_STEPS):
+    """
+    Greedily shrink a divergent program: keep applying the first smaller variant on which the
+    engines still diverge in the same way, until none does. Returns the reproducer's lines.
+    """
+    _, tree = BParser.parse(program)
+
+    def kind(candidate):
+        lines = format_program(candidate)
+        return divergence(
+            run_engine(engine_a, lines, stdin, max_steps),
+            run_engine(engine_b, lines, stdin, max_steps),
+        )
+
+    target = kind(tree)
+    shrunk = True
+    while shrunk:
+        shrunk = False
+        for candidate in candidate_trees(tree):
+            if kind(candidate) == target:
+                tree = candidate
+                shrunk = True
+                break
+    return format_program(tree)
+
+
+def synthetic_programs(version, count, seed=0):
+    """
+    Yield (name, program lines, stdin) for `count` small random brewingen programs in the given
+    dialect; pass shared_version() so that both engines being compared can run them.
+    """
+    generator = random.Random(seed)
+    for index in range(count):
+        sizes = {
+            "classes": generator.randint(1, 4),
+            "depth": generator.randint(0, 3),
+            "methods": generator.randint(1, 4),
+            "templates": generator.randint(0, 2),
+            "nesting": generator.randint(0, 4),
+            "trips": generator.randint(0, 6),
+            "objects": generator.randint(1, 2),
+        }
+        program, _ = generate_program(version, **sizes)
+        yield f"synthetic {index} {sizes}", program, None
+
+
+def compare_engines(engine_a, engine_b, programs, max_steps=DEFAULT_MAX_STEPS):
+    """
+    Run every (name, program lines, stdin) in a list on both engines, printing one line per
+    program and a minimized reproducer for each divergence. Returns the number of divergences.
+    """
+    diverged = 0
+    for name, program, stdin in programs:
+        print(f"Comparing {name}... ", end="")
+        outcome_a = run_engine(engine_a, program, stdin, max_steps)
+        outcome_b = run_engine(engine_b, program, stdin, max_steps)
+        keys = divergence(outcome_a, outcome_b)
+        if not keys:
+            print("SAME")
+            continue
+        diverged += 1
+        print(f"DIVERGED ({', '.join(keys)})")
+        reproducer = minimize(engine_a, engine_b, program, stdin, max_steps)
+        print("Minimized reproducer:")
+        print("".join(reproducer), end="")
+        outcome_a = run_engine(engine_a, reproducer, stdin, max_steps)
+        outcome_b = run_engine(engine_b, reproducer, stdin, max_steps)
+        for engine, outcome in ((engine_a, outcome_a), (engine_b, outcome_b)):
+            print(f"  {engine}: " + ", ".join(f"{key}={outcome[key]}" for key in keys))
+    print(f"{diverged}/{len(programs)} programs diverged.")
+    return diverged
@@ -4,11 +4,28 @@ test management.
 """
 
 import asyncio
+import gc
+import io
+import itertools
 import json
+import multiprocessing
+import os
+import select
+import signal
+import statistics
+import sys
+import threading
+import time
+from contextlib import redirect_stderr, redirect_stdout, suppress
 from os import makedirs
 from os.path import exists
 from abc import ABC, abstractmethod
 
+try:
+    import resource
+except ImportError:  # not available on Windows; isolation mode is POSIX-only
+    resource = None
+
 
 class AbstractTestScaffold(ABC):
     """ABC for test scaffold"""
@@ -21,54 +38,637 @@ class AbstractTestScaffold(ABC):
     def run_test_case(self, test_case, environment):
         """Run the test case end-to-end; return a number encoding the points allocated."""
 
+    def fingerprint(self, test_case):  # pylint: disable=unused-argument
+        """
+        Digest of everything the test case's outcome depends on, for the result cache;
+        None (the default) means the test is never cached.
+        """
+        return None
+
+
+class ResultCache:
+    """
+    Scores of earlier test runs, keyed by scaffold fingerprint and stored as JSON.
+    With refresh, entries already on disk are ignored (but overwritten on save).
+    """
+
+    def __init__(self, path=".test_cache.json", refresh=False):
+        self.path = path
+        self.scores = {}
+        if not refresh and exists(path):
+            with open(path, encoding="utf-8") as handle:
+                self.scores = json.load(handle)
+
+    def get(self, key):
+        """Cached score for key, or None on a miss."""
+        return None if key is None else self.scores.get(key)
+
+    def put(self, key, score):
+        """Record a fresh score (ignored for uncacheable tests)."""
+        if key is not None:
+            self.scores[key] = score
+
+    def save(self):
+        """Write the cache back to disk."""
+        with open(self.path, "w", encoding="utf-8") as handle:
+            json.dump(self.scores, handle, indent=1, sort_keys=True)
+
+
+# adaptive timeouts never go below this many seconds, whatever a test's history says
+MIN_ADAPTIVE_TIMEOUT = 0.5
+
+
+class DurationHistory:
+    """Wall time of each test's last completed run, keyed by test name and stored as JSON."""
 
-def run_test(scaffold, test_case):
-    """Ran a single test case with the scaffold; returns score."""
+    def __init__(self, path=".test_durations.json"):
+        self.path = path
+        self.durations = {}
+        if exists(path):
+            with open(path, encoding="utf-8") as handle:
+                self.durations = json.load(handle)
+
+    def longest_first(self, tests):
+        """
+        Indices of tests, longest recorded duration first; tests never seen before go ahead of
+        all of them, since they may be the longest of all.
+        """
+        return sorted(
+            range(len(tests)),
+            key=lambda index: -self.durations.get(tests[index]["name"], float("inf")),
+        )
+
+    def timeout_for(self, test, multiplier, ceiling):
+        """multiplier times the test's last duration, within [MIN_ADAPTIVE_TIMEOUT, ceiling]."""
+        duration = self.durations.get(test["name"])
+        if duration is None:
+            return ceiling
+        return min(ceiling, max(MIN_ADAPTIVE_TIMEOUT, multiplier * duration))
+
+    def record(self, test, metrics):
+        """Remember a finished test's wall time (timed-out runs say nothing about it)."""
+        if not metrics.get("timed_out") and "wall_time" in metrics:
+            self.durations[test["name"]] = metrics["wall_time"]
+
+    def save(self):
+        """Write the history back to disk."""
+        with open(self.path, "w", encoding="utf-8") as handle:
+            json.dump(self.durations, handle, indent=1, sort_keys=True)
+
+
+def plan_cached_run(scaffold, tests, cache):
+    """
+    Decide which tests actually need to run. A test is answered without running when the cache
+    holds its fingerprint, or when an earlier entry in the suite has the same fingerprint.
+    Returns (fingerprints, indices of tests to run, {index: ("cached", score) or
+    ("duplicate", index of the earlier entry)}).
+    """
+    fingerprints = [scaffold.fingerprint(test) for test in tests]
+    pending, answered, first_seen = [], {}, {}
+    for index, key in enumerate(fingerprints):
+        cached = cache.get(key)
+        if cached is not None:
+            answered[index] = ("cached", cached)
+        elif key is not None and key in first_seen:
+            answered[index] = ("duplicate", first_seen[key])
+        else:
+            if key is not None:
+                first_seen[key] = index
+            pending.append(index)
+    return fingerprints, pending, answered
+
+
+def run_test(scaffold, test_case, metrics=None):
+    """
+    Ran a single test case with the scaffold; returns score. If the scaffold left execution
+    statistics in the test's environment under "stats", they are copied into metrics (if given).
+    """
     environment = scaffold.setup(test_case)
     try:
         return scaffold.run_test_case(test_case, environment)
     except Exception as exception:  # pylint: disable=broad-except
         print(f"Exception during test: {exception}")
         return 0
+    finally:
+        if metrics is not None and "stats" in environment:
+            metrics["stats"] = environment["stats"]
+
+
+def peak_rss_kb(usage=None):
+    """
+    Peak resident set size in KiB from a getrusage/wait4 result (by default this process's own);
+    None where the resource module is unavailable.
+    """
+    if usage is None:
+        if resource is None:
+            return None
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+
+
+def run_test_timed(scaffold, test_case):
+    """
+    run_test, also measuring it; returns (score, metrics). metrics holds wall_time and cpu_time
+    (seconds; CPU of the calling thread) and process_peak_rss_kb, the running process's
+    high-water mark so far (which earlier tests in the same process may have set), plus the
+    scaffold's "stats" when it reports them.
+    """
+    stats = {}
+    wall_start, cpu_start = time.perf_counter(), time.thread_time()
+    result = run_test(scaffold, test_case, stats)
+    metrics = {
+        "wall_time": time.perf_counter() - wall_start,
+        "cpu_time": time.thread_time() - cpu_start,
+        "process_peak_rss_kb": peak_rss_kb(),
+        **stats,
+    }
+    return result, metrics
 
 
 async def run_test_wrapper(interpreter, test_case, timeout):
     """
     Wrapper for run_test with timeout and minor debugging.
     Uses asyncio to enforce timeout, not for concurrency.
+    The test case is handed a "cancel_token" (a threading.Event) that is set on timeout, so a
+    scaffold that passes it to its interpreter stops the runaway thread instead of leaking it.
+    A "timeout" key in the test case overrides `timeout`.
+    Returns (score, metrics) as run_test_timed does.
     """
     print(f'Running {test_case["srcfile"]}... ', end="")
+    cancel_token = threading.Event()
+    timeout = test_case.get("timeout", timeout)
     try:
         async with asyncio.timeout(timeout):
-            result = await asyncio.to_thread(run_test, interpreter, test_case)
+            result, metrics = await asyncio.to_thread(
+                run_test_timed, interpreter, dict(test_case, cancel_token=cancel_token)
+            )
             print(f' {"PASSED" if result else "FAILED"}')
-            return result
+            return result, metrics
     except asyncio.TimeoutError:
+        cancel_token.set()
         print("TIMED OUT")
-        return 0
+        return 0, {"wall_time": timeout, "timed_out": True}
+
+
+def run_test_captured(scaffold, test_case):
+    """
+    Run a single test case in a worker process, capturing what it prints so the parent
+    can replay it in suite order; returns (score, stdout, stderr, metrics).
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        result, metrics = run_test_timed(scaffold, test_case)
+    return result, stdout.getvalue(), stderr.getvalue(), metrics
+
+
+# the scaffold a warm pool worker received once at startup (see init_warm_worker)
+_worker_scaffold = None
+# where a warm pool worker announces each test it picks up (see run_warm_test)
+_worker_started = None
+
+
+def init_warm_worker(scaffold, gc_freeze=False, started=None):
+    """
+    Pool initializer: unpickle the scaffold (importing its interpreter module) once per worker
+    process, and keep the queue `started` to announce tests on. With gc_freeze, everything
+    loaded so far is moved out of the collector's reach so later collections don't rescan (or
+    copy-on-write touch) the preloaded modules.
+    """
+    global _worker_scaffold, _worker_started  # pylint: disable=global-statement
+    _worker_scaffold = scaffold
+    _worker_started = started
+    if gc_freeze:
+        gc.collect()
+        gc.freeze()
+
+
+def run_warm_test(test_case, ticket=None):
+    """
+    run_test_captured against the scaffold this worker was started with, after putting
+    (ticket, pid) on the worker's started queue, if it has one.
+    """
+    if _worker_started is not None:
+        _worker_started.put((ticket, os.getpid()))
+    return run_test_captured(_worker_scaffold, test_case)
+
+
+def submit_to_pool(pool, function, *args):
+    """Start function(*args) on a multiprocessing pool; returns an asyncio future for its result."""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolve(setter, value):
+        # the future may already have been cancelled by a timeout
+        if not future.done():
+            setter(value)
+
+    pool.apply_async(
+        function,
+        args,
+        callback=lambda result: loop.call_soon_threadsafe(resolve, future.set_result, result),
+        error_callback=lambda error: loop.call_soon_threadsafe(
+            resolve, future.set_exception, error
+        ),
+    )
+    return future
 
 
-async def run_all_tests(interpreter, tests, timeout_per_test=5):
+async def run_tests_concurrently(tests, run_one, jobs, order=None):
     """
-    Run all tests sequentially; defaults to 5s timeout per test.
+    Await run_one(test) for every test with at most `jobs` in flight, printing each outcome in
+    the original order and in the same format as run_test_wrapper. Tests start in `order`
+    (indices into tests; suite order by default). run_one returns
+    (score, stdout, stderr, metrics, timeout_message), with timeout_message None unless the test
+    timed out; the result is a list of (score, metrics).
+    """
+    slots = asyncio.Semaphore(jobs)
+
+    async def run_in_slot(test_case):
+        async with slots:
+            return await run_one(test_case)
+
+    # the semaphore wakes waiters first come, first served, so creation order is start order
+    pending = [None] * len(tests)
+    for index in range(len(tests)) if order is None else order:
+        pending[index] = asyncio.create_task(run_in_slot(tests[index]))
+    outcomes = []
+    for test, task in zip(tests, pending):
+        result, stdout, stderr, metrics, timeout_message = await task
+        print(f'Running {test["srcfile"]}... ', end="")
+        sys.stdout.write(stdout)
+        sys.stderr.write(stderr)
+        if timeout_message is not None:
+            print(timeout_message)
+            outcomes.append((0, metrics))
+            continue
+        print(f' {"PASSED" if result else "FAILED"}')
+        outcomes.append((result, metrics))
+    return outcomes
+
+
+async def run_tests_in_pool(scaffold, tests, timeout, jobs, gc_freeze=False, order=None):
+    """
+    Run tests across a pool of `jobs` persistent worker processes (the scaffold must be
+    picklable). Each worker receives the scaffold once at startup and then only test cases
+    over its pipe. Each timeout starts when a worker announces it has picked the test up; a
+    worker that outlives it is killed, and the pool starts a fresh one in its place, so a
+    runaway test can't hold up the tests queued after it. A "timeout" key in a test case
+    overrides `timeout`; `order` is passed on to run_tests_concurrently.
+    """
+    loop = asyncio.get_running_loop()
+    started = multiprocessing.SimpleQueue()
+    pool = multiprocessing.Pool(jobs, init_warm_worker, (scaffold, gc_freeze, started))
+    tickets = itertools.count()
+    pickups = {}  # ticket -> future for the pid of the worker that picked the test up
+    running = {}  # pid -> ticket of the test that worker picked up last
+
+    def kill(pid):
+        # (there's no SIGKILL on Windows, where SIGTERM terminates the process outright)
+        with suppress(ProcessLookupError):
+            os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+
+    def announce(ticket, pid):
+        running[pid] = ticket
+        pickup = pickups.pop(ticket, None)
+        if pickup is None:
+            # picked up after run_one gave up waiting for it: nobody will collect the result
+            kill(pid)
+        else:
+            pickup.set_result(pid)
+
+    def relay_pickups():
+        while (message := started.get()) is not None:
+            loop.call_soon_threadsafe(announce, *message)
+
+    relay = threading.Thread(target=relay_pickups, daemon=True)
+    relay.start()
+
+    async def run_one(test_case):
+        limit = test_case.get("timeout", timeout)
+        timed_out = 0, "", "", {"wall_time": limit, "timed_out": True}, "TIMED OUT"
+        ticket = next(tickets)
+        pickups[ticket] = pickup = loop.create_future()
+        future = submit_to_pool(pool, run_warm_test, test_case, ticket)
+        try:
+            # a worker that dies before announcing the test never resolves the pickup
+            pid = await asyncio.wait_for(pickup, limit)
+        except asyncio.TimeoutError:
+            pickups.pop(ticket, None)
+            return timed_out
+        try:
+            return (*await asyncio.wait_for(future, limit), None)
+        except asyncio.TimeoutError:
+            # the worker may have finished this test and picked up another since
+            if running.get(pid) == ticket:
+                kill(pid)
+            return timed_out
+
+    try:
+        return await run_tests_concurrently(tests, run_one, jobs, order)
+    finally:
+        started.put(None)
+        relay.join()
+        pool.terminate()
+        pool.join()
+
+
+def fork_isolated_test(scaffold, test_case, cpu_limit=None, memory_limit=None):
+    """
+    Fork a child process that applies the resource limits (CPU seconds, address-space bytes),
+    runs the test case with its output captured, and writes the outcome as JSON to a pipe.
+    Returns (pid, read end of the pipe). POSIX only.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid:
+        os.close(write_fd)
+        return pid, read_fd
+
+    # child: never return into the parent's event loop
+    status = 1
+    try:
+        os.close(read_fd)
+        if cpu_limit is not None:
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, cpu_limit + 1))
+        if memory_limit is not None:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+        payload = json.dumps(run_test_captured(scaffold, test_case)).encode("utf-8")
+        with os.fdopen(write_fd, "wb") as handle:
+            handle.write(payload)
+        status = 0
+    finally:
+        os._exit(status)  # pylint: disable=protected-access
+
+
+def collect_isolated_test(pid, read_fd, timeout):
+    """
+    Read a forked test's outcome, SIGKILLing it if it outlives `timeout` seconds; reaps the
+    child and returns (score, stdout, stderr, metrics, timeout_message) like
+    run_tests_concurrently expects. CPU time and peak RSS come from the reaped child's rusage.
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    chunks = []
+    timed_out = False
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([read_fd], [], [], remaining)[0]:
+                timed_out = True
+                os.kill(pid, signal.SIGKILL)
+                break
+            chunk = os.read(read_fd, 1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(read_fd)
+
+    _, status, usage = os.wait4(pid, 0)
+    cpu_time = usage.ru_utime + usage.ru_stime
+    metrics = {
+        "wall_time": time.monotonic() - started,
+        "cpu_time": cpu_time,
+        "peak_rss_kb": peak_rss_kb(usage),
+    }
+    if os.WIFSIGNALED(status) and os.WTERMSIG(status) == signal.SIGXCPU:
+        timed_out = True
+    if timed_out:
+        metrics["timed_out"] = True
+        return 0, "", "", metrics, f"TIMED OUT ({cpu_time:.2f}s CPU)"
+    if not chunks:
+        return 0, f"Test process exited abnormally (status {status})", "", metrics, None
+    result, stdout, stderr, child_metrics = json.loads(b"".join(chunks))
+    # the child's own clock excludes fork and interpreter start-up; its CPU time and RSS don't
+    metrics["wall_time"] = child_metrics["wall_time"]
+    if "stats" in child_metrics:
+        metrics["stats"] = child_metrics["stats"]
+    return result, stdout, stderr, metrics, None
+
+
+async def run_tests_isolated(
+    scaffold, tests, timeout, jobs, cpu_limit=None, memory_limit=None, order=None
+):
+    """
+    Run every test in its own forked child process, up to `jobs` at a time. A child that
+    outlives its timeout is killed outright instead of being left running in the background.
+    A "timeout" key in a test case overrides `timeout`; `order` is passed on to
+    run_tests_concurrently.
+    """
+
+    async def run_one(test_case):
+        # fork from the event-loop thread, then wait for the child off of it
+        pid, read_fd = fork_isolated_test(scaffold, test_case, cpu_limit, memory_limit)
+        limit = test_case.get("timeout", timeout)
+        return await asyncio.to_thread(collect_isolated_test, pid, read_fd, limit)
+
+    return await run_tests_concurrently(tests, run_one, jobs, order)
+
+
+async def run_all_tests(
+    interpreter,
+    tests,
+    timeout_per_test=5,
+    jobs=1,
+    isolate=False,
+    cpu_limit=None,
+    memory_limit=None,
+    warm=False,
+    gc_freeze=False,
+    cache=None,
+    history=None,
+    timeout_multiplier=None,
+):
+    """
+    Run all tests sequentially, or across `jobs` worker processes; defaults to 5s timeout per test.
+    warm uses the worker pool even for a single job, where a timed-out test's worker is
+    replaced so the tests after it still run, and gc_freeze freezes each worker's heap after
+    startup. With isolate, each test instead runs in a child process that is killed on
+    timeout, under optional CPU-second and memory-byte limits.
+    With a ResultCache, tests whose fingerprint is cached (or repeats an earlier entry) are
+    reported without running, after the tests that did run, and marked "cached": true (or
+    "same_as" the test they repeat) in their results; timed-out tests, and failures under
+    cpu_limit or memory_limit, are never cached.
+    Each result that actually ran carries its wall_time and cpu_time in "extra_data", along with
+    the interpreter's execution "stats" when the scaffold collects them, and its memory use:
+    peak_rss_kb, the test's own peak, with isolate, and otherwise process_peak_rss_kb, the
+    peak of the (shared) process it ran in so far.
+    With a DurationHistory, parallel runs start the historically longest tests first (LPT), and
+    the durations measured this time are saved for the next run; adding timeout_multiplier
+    gives each known test that multiple of its last duration as its timeout instead (never
+    less than MIN_ADAPTIVE_TIMEOUT, never more than timeout_per_test); a test that times out
+    under its adaptive limit is re-run once under timeout_per_test before it counts as failed.
     Each test case *must* have a name and srcfile key.
     """
     print(f"Running {len(tests)} tests...")
+    if cache is not None:
+        fingerprints, pending, answered = plan_cached_run(interpreter, tests, cache)
+    else:
+        fingerprints, pending, answered = [None] * len(tests), range(len(tests)), {}
+    to_run = [tests[index] for index in pending]
+    order = None
+    if history is not None:
+        order = history.longest_first(to_run)
+        if timeout_multiplier is not None:
+            to_run = [
+                dict(test, timeout=history.timeout_for(test, timeout_multiplier, timeout_per_test))
+                for test in to_run
+            ]
+    async def run(tests_to_run, order=None):
+        if isolate:
+            return await run_tests_isolated(
+                interpreter, tests_to_run, timeout_per_test, jobs, cpu_limit, memory_limit, order
+            )
+        if jobs > 1 or warm:
+            return await run_tests_in_pool(
+                interpreter, tests_to_run, timeout_per_test, jobs, gc_freeze, order
+            )
+        return [
+            await run_test_wrapper(interpreter, test, timeout_per_test) for test in tests_to_run
+        ]
+
+    outcomes = await run(to_run, order)
+    # a test that outgrew its adaptive limit gets one more chance under the flat timeout, so
+    # that it isn't failed (and its history left stale) just for having become slower
+    retries = [
+        position
+        for position, (test, (_, metrics)) in enumerate(zip(to_run, outcomes))
+        if metrics.get("timed_out") and test.get("timeout", timeout_per_test) < timeout_per_test
+    ]
+    if retries:
+        print(f"Re-running {len(retries)} tests that hit their adaptive timeout...")
+        rerun = [dict(to_run[position], timeout=timeout_per_test) for position in retries]
+        for position, outcome in zip(retries, await run(rerun)):
+            outcomes[position] = outcome
+    scores = [None] * len(tests)
+    extra_data = [None] * len(tests)
+    for index, (score, metrics) in zip(pending, outcomes):
+        scores[index] = score
+        extra_data[index] = metrics
+    for index, (source, detail) in sorted(answered.items()):
+        if source == "cached":
+            scores[index] = detail
+            note = "cached"
+        else:
+            scores[index] = scores[detail]
+            note = f'same as {tests[detail]["name"]}'
+        outcome = "PASSED" if scores[index] else "FAILED"
+        print(f'Skipping {tests[index]["srcfile"]}...  {outcome} ({note})')
+    if cache is not None:
+        for index in pending:
+            # timeouts, and failures under resource limits, depend on machine load and on
+            # options the fingerprint doesn't cover, so they are run again next time
+            if extra_data[index].get("timed_out"):
+                continue
+            if not scores[index] and (cpu_limit is not None or memory_limit is not None):
+                continue
+            cache.put(fingerprints[index], scores[index])
+        cache.save()
+    if history is not None:
+        for test, (_, metrics) in zip(to_run, outcomes):
+            history.record(test, metrics)
+        history.save()
     results = [
         {
             "name": test["name"],
-            "score": await run_test_wrapper(interpreter, test, timeout_per_test),
+            "score": score,
             "max_score": 1,
             "visibility": "visible"
             if test.get("visible", False)
             else "after_published",
         }
-        for test in tests
+        for test, score in zip(tests, scores)
     ]
+    for result, metrics in zip(results, extra_data):
+        if metrics is not None:
+            result["extra_data"] = metrics
+    for index, (source, detail) in answered.items():
+        # not run this time, so there are no metrics to report either
+        if source == "cached":
+            results[index]["cached"] = True
+        else:
+            results[index]["same_as"] = tests[detail]["name"]
     print(f"{get_score(results)}/{len(tests)} tests passed.")
     return results
 
 
+def find_regressions(results, baseline, threshold, metric="cpu_time", floor=0.005):
+    """
+    Compare each result's extra_data[metric] (seconds) with the same-named test in baseline, a
+    previous results.json payload, and the total over the tests both runs measured. A test or
+    the total regresses when it got slower by more than `threshold` (a fraction: 0.2 is 20%)
+    and by at least `floor` seconds, so millisecond noise doesn't trip the gate.
+    Returns one message per regression.
+    """
+    before = {
+        test["name"]: test["extra_data"][metric]
+        for test in baseline.get("tests", [])
+        if metric in test.get("extra_data", {})
+    }
+    messages = []
+    total_before = total_after = 0.0
+    for result in results:
+        after = result.get("extra_data", {}).get(metric)
+        if after is None or result["name"] not in before:
+            continue
+        previous = before[result["name"]]
+        total_before += previous
+        total_after += after
+        if after - previous > max(previous * threshold, floor):
+            messages.append(f'{result["name"]}: {metric} {previous:.3f}s -> {after:.3f}s')
+    if total_after - total_before > max(total_before * threshold, floor):
+        messages.append(f"total: {metric} {total_before:.3f}s -> {total_after:.3f}s")
+    return messages
+
+
+def load_durations(path):
+    """Per-test wall times, by test name, from an earlier results.json; {} if it is missing."""
+    if not exists(path):
+        return {}
+    with open(path, encoding="utf-8") as handle:
+        data = json.load(handle)
+    return {
+        test["name"]: test["extra_data"]["wall_time"]
+        for test in data.get("tests", [])
+        if "wall_time" in test.get("extra_data", {})
+    }
+
+
+def shard_tests(tests, index, count, durations=None):
+    """
+    Split tests into `count` shards balanced by expected runtime and return shard `index`
+    (0-based) in suite order. Tests are dealt longest-first to the shard with the least work so
+    far, ties going to the lower shard, so every machine computes the same split from the same
+    durations. Tests without a recorded duration weigh the median of the known ones.
+    """
+    durations = durations or {}
+    known = [durations[test["name"]] for test in tests if test["name"] in durations]
+    default = statistics.median(known) if known else 1.0
+    weights = [durations.get(test["name"], default) for test in tests]
+    order = sorted(range(len(tests)), key=lambda i: (-weights[i], tests[i]["name"], i))
+    loads = [0.0] * count
+    shard_of = [None] * len(tests)
+    for position in order:
+        shard = min(range(count), key=lambda candidate: (loads[candidate], candidate))
+        shard_of[position] = shard
+        loads[shard] += weights[position]
+    return [test for position, test in enumerate(tests) if shard_of[position] == index]
+
+
+def merge_results(paths):
+    """
+    Combine the tests of several (per-shard) results.json files, in the order given; if a test
+    name shows up more than once, the last file's entry wins.
+    """
+    merged = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as handle:
+            for test in json.load(handle).get("tests", []):
+                merged[test["name"]] = test
+    return list(merged.values())
+
+
 def format_gradescope_output(results):
     """Generate proper JSON object depending on results type."""
     if isinstance(results, (int, float)):
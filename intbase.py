@@ -6,8 +6,11 @@ When grading, we will use our own copy of intbase; you should not submit a copy
 or make any changes to your local copy!
 """
 
+import time
 from enum import Enum
 from bparser import BParser
+from brewinio import MemorySink, InputSource
+from brewintrace import ExecutionTrace
 
 
 class ErrorType(Enum):
@@ -21,6 +24,82 @@ class ErrorType(Enum):
     FAULT_ERROR = 4  # used if an object reference is null and used to make a call
 
 
+class FuelExhaustedError(RuntimeError):
+    """
+    Raised when a run executes more statements than its max_steps budget allows.
+    """
+
+
+class ExecutionCancelledError(RuntimeError):
+    """
+    Raised when a run's cancel_token is set while the program is still executing.
+    """
+
+
+class ExecutionStats:
+    """
+    Integer counters the evaluators bump as a program runs; InterpreterBase.get_stats() reports
+    them. Dicts are keyed by the operator token or class name they count. `untracked` names the
+    as_dict keys an interpreter version has no counter for; they are reported as None, not 0.
+    """
+
+    def __init__(self, untracked=()):
+        self.untracked = untracked
+        self.statements = {}  # statement operator -> times executed
+        self.expressions = {}  # expression operator -> times evaluated
+        self.method_calls = 0
+        self.objects = {}  # class name -> instances created
+        self.template_instantiations = 0
+        self.call_depth = 0
+        self.max_call_depth = 0
+        self.max_environment_depth = 0
+        self.tries = 0
+        self.throws = 0
+        self.catches = 0
+        # hits on the evaluator's per-node caches
+        self.operator_site_hits = 0
+        self.let_scope_hits = 0
+        self.pure_operand_site_hits = 0
+
+    def count_expression(self, operator):
+        """Count one evaluation of a compound expression."""
+        self.expressions[operator] = self.expressions.get(operator, 0) + 1
+
+    def count_object(self, class_name):
+        """Count one instance created of a class."""
+        self.objects[class_name] = self.objects.get(class_name, 0) + 1
+
+    def note_environment_depth(self, depth):
+        """Raise max_environment_depth to the depth of an environment stack just pushed to."""
+        if depth > self.max_environment_depth:
+            self.max_environment_depth = depth
+
+    def as_dict(self):
+        """The counters as a JSON-ready dict (the depth currently on the stack is left out)."""
+        stats = {
+            "statements_by_kind": {str(key): count for key, count in self.statements.items()},
+            "expressions_by_operator": {
+                str(key): count for key, count in self.expressions.items()
+            },
+            "method_calls": self.method_calls,
+            "objects_by_class": {str(key): count for key, count in self.objects.items()},
+            "template_instantiations": self.template_instantiations,
+            "max_call_depth": self.max_call_depth,
+            "max_environment_depth": self.max_environment_depth,
+            "tries": self.tries,
+            "throws": self.throws,
+            "catches": self.catches,
+            "cache_hits": {
+                "operator_sites": self.operator_site_hits,
+                "let_scopes": self.let_scope_hits,
+                "pure_operand_sites": self.pure_operand_site_hits,
+            },
+        }
+        for key in self.untracked:
+            stats[key] = None
+        return stats
+
+
 class InterpreterBase:
     """
     Base class for the interpreter; your implementation should subclass InterpreterBase.
@@ -60,11 +139,40 @@ class InterpreterBase:
     EXCEPTION_VARIABLE_DEF = "exception"
     TYPE_CONCAT_CHAR = "@"
 
+    # as_dict keys of the ExecutionStats counters this version's evaluators never bump
+    UNTRACKED_STATS = ()
+
     # methods
-    def __init__(self, console_output=True, inp=None):
+    def __init__(
+        self,
+        console_output=True,
+        inp=None,
+        output_sink=None,
+        max_steps=None,
+        cancel_token=None,
+        trace_output=False,
+    ):
         self.console_output = console_output
-        self.inp = inp  # if not none, then read input from passed-in list
-        self.output_log = []
+        self.inp = inp  # if not none, then read input from passed-in list or InputSource
+        # where output() sends each line; defaults to an in-memory log
+        self.output_sink = output_sink if output_sink is not None else MemorySink(console_output)
+        # statement budget ("fuel") and a threading.Event-like token (anything with is_set())
+        # that another thread sets to stop the run; both are checked by check_budget()
+        self.max_steps = max_steps
+        self.cancel_token = cancel_token
+        self.steps = 0
+        self.stats = ExecutionStats(self.UNTRACKED_STATS)
+        # seconds spent in each phase of the last run (parse, discovery, execution)
+        self.phase_times = {}
+        self.phase_mark = None
+        # ring buffer of the last statements executed, dumped by error(); None when tracing is off
+        self.trace = ExecutionTrace() if trace_output else None
+        # shadow Brewin call stack of [class name, method name, current statement token, receiver,
+        # environment stack] frames, kept by the evaluators for the trace, samplers and heap
+        # inspector; None (and not kept) when unused
+        self.call_stack = [] if trace_output else None
+        # the running program's main object, a root for heap inspection
+        self.main_object = None
         self.input_cursor = 0
         self.error_type = None
         self.error_line = None
@@ -73,8 +181,19 @@ class InterpreterBase:
         """
         "Reset" I/O for another run of the program
         """
-        self.output_log = []
+        self.output_sink.reset()
+        self.steps = 0
+        self.stats = ExecutionStats(self.UNTRACKED_STATS)
+        self.phase_times = {}
+        self.phase_mark = None
+        if self.trace is not None:
+            self.trace.clear()
+        if self.call_stack is not None:
+            self.call_stack.clear()
+        self.main_object = None
         self.input_cursor = 0
+        if isinstance(self.inp, InputSource):
+            self.inp.rewind()
         self.error_type = None
         self.error_line = None
 
@@ -88,6 +207,9 @@ class InterpreterBase:
         if not self.inp:
             return input()  # Get input from keyboard if not input list provided
 
+        if isinstance(self.inp, InputSource):
+            return self.inp.read_line()
+
         if self.input_cursor < len(self.inp):
             cur_input = self.inp[self.input_cursor]
             self.input_cursor += 1
@@ -103,29 +225,124 @@ class InterpreterBase:
         # log the error before we throw
         self.error_line = line_num
         self.error_type = error_type
+        self.flush_output()
 
         if description:
             description = ": " + description
         else:
             description = ""
 
+        if self.trace is not None:
+            location = f" on line {line_num}" if line_num else ""
+            self.trace.dump(f"{error_type}{location}{description}")
+
         if line_num:
             raise RuntimeError(f"{error_type} on line {line_num}{description}")
 
         raise RuntimeError(f"{error_type}{description}")
 
+    def check_budget(self):
+        """
+        Stop the run if it has used up its statement budget or been cancelled. Evaluators count
+        each executed statement in self.steps and call this at loop back-edges and method entry.
+        """
+        if self.max_steps is not None and self.steps > self.max_steps:
+            self.flush_output()
+            raise FuelExhaustedError(
+                f"Step budget of {self.max_steps} exhausted after {self.steps} statements"
+            )
+        if self.cancel_token is not None and self.cancel_token.is_set():
+            self.flush_output()
+            raise ExecutionCancelledError(f"Cancelled after {self.steps} statements")
+
+    def begin_statement(self, operator):
+        """
+        Bookkeeping evaluators do before executing each statement: count it against the budget
+        and in the stats, point the innermost call_stack frame at it and record it in the trace.
+        Returns the trace step to pass to trace.set_value, or None when tracing is off.
+        """
+        self.steps += 1
+        statements = self.stats.statements
+        statements[operator] = statements.get(operator, 0) + 1
+        call_stack = self.call_stack
+        if call_stack is not None:
+            call_stack[-1][2] = operator
+        if self.trace is None:
+            return None
+        return self.trace.record(operator, call_stack[-1] if call_stack else None)
+
+    def call_in_frame(self, receiver, method_name, environment_stack, function, *args):
+        """
+        Run function(*args), the body of a Brewin method called on receiver, counting the call
+        and its depth in the stats and, when the call_stack is kept, inside a frame for it.
+        """
+        stats = self.stats
+        stats.method_calls += 1
+        stats.call_depth += 1
+        if stats.call_depth > stats.max_call_depth:
+            stats.max_call_depth = stats.call_depth
+        stats.note_environment_depth(len(environment_stack))
+
+        call_stack = self.call_stack
+        if call_stack is None:
+            result = function(*args)
+        else:
+            call_stack.append([receiver.name, method_name, None, receiver, environment_stack])
+            try:
+                result = function(*args)
+            finally:
+                call_stack.pop()
+
+        # (left raised on errors; v3 restores the depth a try block started at when it catches)
+        stats.call_depth -= 1
+        return result
+
+    def start_main(self, main_object):
+        """Record the program's main object, a root for heap inspection and its class's first instance."""
+        self.main_object = main_object
+        self.stats.count_object(main_object.name)
+
+    def start_phases(self):
+        """Start timing the phases of a run; called at the top of run()."""
+        self.phase_times = {}
+        self.phase_mark = time.perf_counter()
+
+    def end_phase(self, name):
+        """Record the time since the previous phase ended (or run started) under name."""
+        now = time.perf_counter()
+        self.phase_times[name] = now - self.phase_mark
+        self.phase_mark = now
+
     def output(self, val):
         """
         Wrapper for stdout (letting us spy on output and control if it's printed).
         Students should call this when they want to print to stdout!
         """
-        if self.console_output:
-            print(val)
-        self.output_log.append(val)
+        self.output_sink.write(val)
+
+    def flush_output(self):
+        """Flush whatever the output sink is still buffering; called at program end and on error."""
+        self.output_sink.flush()
 
     def get_output(self):
         """Get full output log (what should have gone to stdout.)"""
-        return self.output_log
+        return self.output_sink.get_output()
+
+    @property
+    def output_log(self):
+        """The lines the output sink currently holds, read afresh on every access."""
+        return self.output_sink.get_output()
+
+    def get_stats(self):
+        """
+        Execution statistics of the last run: the statements executed, the ExecutionStats
+        counters the interpreter keeps, and the seconds spent in each phase.
+        """
+        return {
+            "statements_executed": self.steps,
+            **self.stats.as_dict(),
+            "phase_times": dict(self.phase_times),
+        }
 
     def get_error_type_and_line(self):
         """If an error has occured, return its type and line number."""
@@ -3,8 +3,16 @@ from intbase import InterpreterBase, ErrorType
 from classesv1 import ClassDefinition, ClassInstance
 
 class Interpreter(InterpreterBase):
-    def __init__(self, console_output=True, inp=None, trace_output=False):
-        super().__init__(console_output, inp)
+    # no templates, exceptions, nested scopes or per-node caches in this version
+    UNTRACKED_STATS = ("template_instantiations", "max_environment_depth", "tries", "throws", "catches", "cache_hits")
+
+    def __init__(self, console_output=True, inp=None, trace_output=False, output_sink=None, max_steps=None, cancel_token=None):
+        super().__init__(console_output, inp, output_sink, max_steps, cancel_token, trace_output)
+        self.classes = {}
+
+    # lets one instance run program after program (e.g. in a warm test worker)
+    def reset(self):
+        super().reset()
         self.classes = {}
 
     def __discover_all_classes_and_track_them(self, parsed_program):
@@ -16,19 +24,28 @@ class Interpreter(InterpreterBase):
                 self.classes[c[1]] = ClassDefinition(c[1], c[2:], self)
     
     def run(self, program):
+        self.start_phases()
         result, parsed_program = BParser.parse(program)
+        self.end_phase("parse")
 
         if not result:
             print("Parsing failed. There must have been a mismatched parenthesis.")
 
         self.__discover_all_classes_and_track_them(parsed_program)
+        self.end_phase("discovery")
 
         # for _, c in self.classes.items():
         #     c.print()
 
         obj = ClassInstance(self, "main", self.classes["main"])
+        self.start_main(obj)
         obj.run_method("main")
 
+        self.end_phase("execution")
+
+        # buffered output sinks write out here (InterpreterBase.error flushes on the error path)
+        self.flush_output()
+
     # Before calling this function, must merge fields and other environment variables into a single dictionary. Must add a "me" key mapped to "self".
     def call_function(self, object, method_name, arguments_passed):
         return object.value.run_method(method_name, arguments_passed)
\ No newline at end of file
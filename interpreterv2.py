@@ -1,12 +1,25 @@
 from bparser import BParser
 from intbase import InterpreterBase, ErrorType
 from classesv2 import ClassDefinition, ClassInstance, Value, Type
+from brewinprof import LineProfiler
 from copy import copy
 
 class Interpreter(InterpreterBase):
-    def __init__(self, console_output=True, inp=None, trace_output=False):
-        super().__init__(console_output, inp)
+    # no templates, exceptions or per-node caches in this version
+    UNTRACKED_STATS = ("template_instantiations", "tries", "throws", "catches", "cache_hits")
+
+    # profile_lines records per-source-line counts and times in self.line_profiler (a LineProfiler)
+    def __init__(self, console_output=True, inp=None, trace_output=False, output_sink=None, max_steps=None, cancel_token=None, profile_lines=False):
+        super().__init__(console_output, inp, output_sink, max_steps, cancel_token, trace_output)
+        self.line_profiler = LineProfiler() if profile_lines else None
+        self.classes = {}
+
+    # lets one instance run program after program (e.g. in a warm test worker)
+    def reset(self):
+        super().reset()
         self.classes = {}
+        if self.line_profiler is not None:
+            self.line_profiler = LineProfiler()
 
     def __discover_all_classes_and_track_them(self, parsed_program):
         for c in parsed_program:
@@ -25,18 +38,22 @@ class Interpreter(InterpreterBase):
                     self.classes[c[1]] = ClassDefinition(c[1], c[2:], self)
     
     def run(self, program):
+        self.start_phases()
         result, parsed_program = BParser.parse(program)
+        self.end_phase("parse")
 
         if not result:
             print("Parsing failed. There must have been a mismatched parenthesis.")
 
         self.__discover_all_classes_and_track_them(parsed_program)
         self.__check_valid_method_types()
+        self.end_phase("discovery")
 
         # for _, c in self.classes.items():
         #     c.print()
 
         obj = ClassInstance(self, InterpreterBase.MAIN_CLASS_DEF, self.classes[InterpreterBase.MAIN_CLASS_DEF])
+        self.start_main(obj)
 
         environment_stack = []
 
@@ -44,6 +61,11 @@ class Interpreter(InterpreterBase):
 
         self.call_function(environment_stack, main_object, InterpreterBase.MAIN_FUNC_DEF, [])
 
+        self.end_phase("execution")
+
+        # buffered output sinks write out here (InterpreterBase.error flushes on the error path)
+        self.flush_output()
+
     # Before calling this function, must merge fields and other environment variables into a single dictionary. Must add a "me" key mapped to "self".
     def call_function(self, environment_stack, object, method_name, arguments_passed, variable_type=None):
         obj = object.value
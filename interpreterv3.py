@@ -1,17 +1,40 @@
 from bparser import BParser
 from intbase import InterpreterBase, ErrorType
-from classesv3 import ClassDefinition, ClassInstance, Value, Type, Variable, TemplateClassDefinition
+from classesv3 import ClassDefinition, ClassInstance, Value, Type, TemplateClassDefinition, BrewinException
+from brewinprof import LineProfiler, MethodProfiler
 from copy import copy
 
-#Have an interpreter field that always refers to the latest exception variable, to carry to new function calls
-
 class Interpreter(InterpreterBase):
-    def __init__(self, console_output=True, inp=None, trace_output=False):
-        super().__init__(console_output, inp)
+    # short_circuit opts into a dialect where & and | skip their right operand once the left one decides the result
+    # reference keeps no let scope or operator site caches and never skips pure & and | operands (a baseline for difftest)
+    # profile_methods records per-method call counts and times in self.method_profiler (a MethodProfiler)
+    # profile_lines records per-source-line counts and times in self.line_profiler (a LineProfiler)
+    def __init__(self, console_output=True, inp=None, trace_output=False, short_circuit=False, output_sink=None, max_steps=None, cancel_token=None, profile_methods=False, profile_lines=False, reference=False):
+        super().__init__(console_output, inp, output_sink, max_steps, cancel_token, trace_output)
+        self.short_circuit = short_circuit
+        self.reference = reference
+        self.method_profiler = MethodProfiler() if profile_methods else None
+        self.line_profiler = LineProfiler() if profile_lines else None
+        self.classes = {}
+        self.templated_classes = {}
+        self.let_scopes = {}
+        self.operator_sites = {}
+        self.pure_operand_sites = {}
+        self.types = [InterpreterBase.NULL_DEF, InterpreterBase.INT_DEF, InterpreterBase.BOOL_DEF, InterpreterBase.STRING_DEF, InterpreterBase.EXCEPTION_VARIABLE_DEF]
+
+    # lets one instance run program after program (e.g. in a warm test worker); the caches are keyed by node ids of the previous program
+    def reset(self):
+        super().reset()
         self.classes = {}
         self.templated_classes = {}
+        self.let_scopes = {}
+        self.operator_sites = {}
+        self.pure_operand_sites = {}
         self.types = [InterpreterBase.NULL_DEF, InterpreterBase.INT_DEF, InterpreterBase.BOOL_DEF, InterpreterBase.STRING_DEF, InterpreterBase.EXCEPTION_VARIABLE_DEF]
-        self.latest_exception_dictionary = {InterpreterBase.EXCEPTION_VARIABLE_DEF : Variable(InterpreterBase.STRING_DEF, InterpreterBase.EXCEPTION_VARIABLE_DEF, Value('""'), self)}
+        if self.method_profiler is not None:
+            self.method_profiler = MethodProfiler()
+        if self.line_profiler is not None:
+            self.line_profiler = LineProfiler()
 
     def __discover_all_classes_and_track_them(self, parsed_program):
         for c in parsed_program:
@@ -45,26 +68,40 @@ class Interpreter(InterpreterBase):
 
         self.classes[type] = self.templated_classes[deliminated_type[0]].create_class(deliminated_type[1:])
         self.types.append(type)
+        self.stats.template_instantiations += 1
 
     def run(self, program):
+        self.start_phases()
         result, parsed_program = BParser.parse(program)
+        self.end_phase("parse")
 
         if not result:
             print("Parsing failed. There must have been a mismatched parenthesis.")
 
         self.__discover_all_classes_and_track_them(parsed_program)
         self.__check_valid_method_types()
+        self.end_phase("discovery")
 
         # for _, c in self.classes.items():
         #     c.print()
 
         obj = ClassInstance(self, InterpreterBase.MAIN_CLASS_DEF, self.classes[InterpreterBase.MAIN_CLASS_DEF])
+        self.start_main(obj)
 
         environment_stack = []
 
         main_object = Value(obj)
 
-        self.call_function(environment_stack, main_object, InterpreterBase.MAIN_FUNC_DEF, [])
+        try:
+            self.call_function(environment_stack, main_object, InterpreterBase.MAIN_FUNC_DEF, [])
+        except BrewinException:
+            # An exception nobody caught just ends the program
+            pass
+
+        self.end_phase("execution")
+
+        # buffered output sinks write out here (InterpreterBase.error flushes on the error path)
+        self.flush_output()
 
     # Before calling this function, must merge fields and other environment variables into a single dictionary. Must add a "me" key mapped to "self".
     def call_function(self, environment_stack, object, method_name, arguments_passed, variable_type=None):
@@ -82,11 +119,16 @@ class Interpreter(InterpreterBase):
                 self.error(ErrorType.TYPE_ERROR)
 
         environment_stack.append(fields)
-        environment_stack.append(self.latest_exception_dictionary)
 
-        return_value = obj.run_method(environment_stack, method, arguments_passed)
+        if self.method_profiler is None:
+            return_value = obj.run_method(environment_stack, method, arguments_passed)
+        else:
+            self.method_profiler.enter(obj.name, method)
+            try:
+                return_value = obj.run_method(environment_stack, method, arguments_passed)
+            finally:
+                self.method_profiler.exit()
         
-        environment_stack.pop()
         environment_stack.pop()
 
         if return_value is not None and return_value.type == Type.NULL:
@@ -2,17 +2,33 @@
 Implements all CS 131-related test logic; is entry-point for testing framework.
 """
 
+import argparse
 import asyncio
+import hashlib
 import importlib
+import inspect
+import json
 from os import environ
 import os
 import sys
 import traceback
+from glob import glob
 from operator import itemgetter
 
+from brewinio import MmapInputSource
+from brewinpack import CorpusArchive
+from difftest import Engine, compare_engines, shared_version, synthetic_programs
+from intbase import ExecutionCancelledError, FuelExhaustedError
 from harness import (
     AbstractTestScaffold,
+    DurationHistory,
+    ResultCache,
+    find_regressions,
+    format_gradescope_output,
+    load_durations,
+    merge_results,
     run_all_tests,
+    shard_tests,
     get_score,
     write_gradescope_output,
 )
@@ -21,10 +37,112 @@ from harness import (
 class TestScaffold(AbstractTestScaffold):
     """Implement scaffold for Brewin' interpreter; load file, validate syntax, run testcase."""
 
-    def __init__(self, interpreter_lib):
+    def __init__(
+        self,
+        interpreter_lib,
+        lazy_input=False,
+        max_steps=None,
+        reuse_interpreter=False,
+        archive_path=None,
+        collect_stats=False,
+    ):
         self.interpreter_lib = interpreter_lib
+        # memory-map .in files and decode them a line at a time instead of preloading a list
+        self.lazy_input = lazy_input
+        # deterministic per-test statement budget, independent of machine speed
+        self.max_steps = max_steps
+        # keep one Interpreter and reset() it between tests instead of building one per test;
+        # only safe when tests run one at a time per scaffold (e.g. in warm worker processes)
+        self.reuse_interpreter = reuse_interpreter
+        self.interpreter = None
+        # hash of the interpreter's sources, computed on first use by source_digest()
+        self.cached_source_digest = None
+        # corpus archive (see brewinpack) that test cases with an "archive_entry" are read from;
+        # mapped on first use, so each worker process maps its own
+        self.archive_path = archive_path
+        self.archive = None
+        # leave each run's Interpreter.get_stats() in its environment, for the harness to report
+        self.collect_stats = collect_stats
+
+    def __getstate__(self):
+        # modules don't pickle; worker processes re-import the interpreter by name
+        state = dict(self.__dict__)
+        state["interpreter_lib"] = self.interpreter_lib.__name__
+        state["interpreter"] = None
+        state["archive"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.interpreter_lib = importlib.import_module(state["interpreter_lib"])
+
+    def source_digest(self):
+        """
+        Hash of the interpreter module and every local module it draws on (intbase, bparser,
+        its classes module, ...), found by following the names each module imports.
+        """
+        if self.cached_source_digest is None:
+            root = os.path.dirname(os.path.abspath(self.interpreter_lib.__file__))
+            seen, pending = {}, [self.interpreter_lib]
+            while pending:
+                module = pending.pop()
+                path = getattr(module, "__file__", None)
+                if module.__name__ in seen or path is None:
+                    continue
+                if os.path.dirname(os.path.abspath(path)) != root:
+                    continue
+                seen[module.__name__] = path
+                for value in vars(module).values():
+                    owner = value if inspect.ismodule(value) else inspect.getmodule(value)
+                    if owner is not None:
+                        pending.append(owner)
+            digest = hashlib.sha256()
+            for name in sorted(seen):
+                with open(seen[name], "rb") as handle:
+                    digest.update(name.encode("utf-8") + b"\0" + handle.read() + b"\0")
+            self.cached_source_digest = digest.hexdigest()
+        return self.cached_source_digest
+
+    def read_test_file(self, test_case, key):
+        """Raw bytes of a test's srcfile, inputfile or expfile (from the archive or disk), or None."""
+        if "archive_entry" in test_case:
+            kind = {"srcfile": "brewin", "inputfile": "in", "expfile": "exp"}[key]
+            return self.open_archive().read(test_case["archive_entry"], kind)
+        try:
+            with open(test_case[key], "rb") as handle:
+                return handle.read()
+        except FileNotFoundError:
+            return None
+
+    def open_archive(self):
+        """The scaffold's CorpusArchive, mapped on first use."""
+        if self.archive is None:
+            self.archive = CorpusArchive(self.archive_path)
+        return self.archive
+
+    def fingerprint(self, test_case):
+        digest = hashlib.sha256(self.source_digest().encode("utf-8"))
+        options = (test_case["expect_failure"], self.max_steps, test_case.get("short_circuit", False))
+        digest.update(repr(options).encode("utf-8"))
+        for key in ("srcfile", "inputfile", "expfile"):
+            data = self.read_test_file(test_case, key)
+            digest.update(b"\2" if data is None else b"\1" + data)
+        return digest.hexdigest()
+
+    def setup_from_archive(self, test_case):
+        """setup() for a test case packed into the scaffold's archive: slices, no file opens."""
+        archive, name = self.open_archive(), test_case["archive_entry"]
+        stdin = archive.read_lines(name, "in")
+        return {
+            "expected": list(map(lambda x: x.rstrip("\n"), archive.read_lines(name, "exp"))),
+            "stdin": None if stdin is None else list(map(lambda x: x.rstrip("\n"), stdin)),
+            "program": archive.read_lines(name, "brewin"),
+        }
 
     def setup(self, test_case):
+        if "archive_entry" in test_case:
+            return self.setup_from_archive(test_case)
+
         inputfile, expfile, srcfile = itemgetter("inputfile", "expfile", "srcfile")(
             test_case
         )
@@ -33,8 +151,11 @@ class TestScaffold(AbstractTestScaffold):
             expected = list(map(lambda x: x.rstrip("\n"), handle.readlines()))
 
         try:
-            with open(inputfile, encoding="utf-8") as handle:
-                stdin = list(map(lambda x: x.rstrip("\n"), handle.readlines()))
+            if self.lazy_input:
+                stdin = MmapInputSource(inputfile)
+            else:
+                with open(inputfile, encoding="utf-8") as handle:
+                    stdin = list(map(lambda x: x.rstrip("\n"), handle.readlines()))
         except FileNotFoundError:
             stdin = None
 
@@ -47,15 +168,47 @@ class TestScaffold(AbstractTestScaffold):
             "program": program,
         }
 
+    def make_interpreter(self, stdin, cancel_token, short_circuit=False):
+        """Build an interpreter for one test case, or reset and reuse the previous one."""
+        if self.reuse_interpreter and self.interpreter is not None:
+            self.interpreter.inp = stdin
+            self.interpreter.cancel_token = cancel_token
+            if hasattr(self.interpreter, "short_circuit"):
+                self.interpreter.short_circuit = short_circuit
+            self.interpreter.reset()
+            return self.interpreter
+        # only v3 takes short_circuit, and only its tests under short_circuit/ set it
+        options = {"short_circuit": True} if short_circuit else {}
+        interpreter = self.interpreter_lib.Interpreter(
+            False,
+            stdin,
+            False,
+            max_steps=self.max_steps,
+            cancel_token=cancel_token,
+            **options,
+        )
+        if self.reuse_interpreter:
+            self.interpreter = interpreter
+        return interpreter
+
     def run_test_case(self, test_case, environment):
         expect_failure = itemgetter("expect_failure")(test_case)
         stdin, expected, program = itemgetter("stdin", "expected", "program")(
             environment
         )
-        interpreter = self.interpreter_lib.Interpreter(False, stdin, False)
+        interpreter = self.make_interpreter(
+            stdin, test_case.get("cancel_token"), test_case.get("short_circuit", False)
+        )
         try:
             interpreter.validate_program(program)
             interpreter.run(program)
+        except ExecutionCancelledError:
+            # the harness already reported this test as timed out
+            return 0
+        except FuelExhaustedError as exception:
+            print("\nOut of fuel:")
+            print(exception)
+            return 0
         except Exception as exception:  # pylint: disable=broad-except
             if expect_failure:
                 error_type, _ = interpreter.get_error_type_and_line()
@@ -71,6 +224,9 @@ class TestScaffold(AbstractTestScaffold):
             print(exception)
             traceback.print_exc()
             return 0
+        finally:
+            if self.collect_stats:
+                environment["stats"] = interpreter.get_stats()
 
         if expect_failure:
             print("\nExpected error:")
@@ -100,6 +256,8 @@ def __generate_test_case_structure(
             "expfile": f"{directory}{i}.exp",
             "expect_failure": expect_failure,
             "visible": visible(f"test{i}"),
+            # v3 tests of the short-circuit dialect (see Interpreter's short_circuit option)
+            "short_circuit": i.startswith("short_circuit/"),
         }
         for i in cases
     ]
@@ -119,218 +277,308 @@ def __generate_test_suite(version, successes, failures):
     )
 
 
+def discover_tests(directory):
+    """
+    Names (relative to directory, without the extension) of every .brewin file under it,
+    subdirectories included, that has a matching .exp file; sorted.
+    """
+    names = []
+    for srcfile in glob(os.path.join(directory, "**", "*.brewin"), recursive=True):
+        name = os.path.relpath(srcfile, directory)[: -len(".brewin")].replace(os.sep, "/")
+        if os.path.exists(os.path.join(directory, f"{name}.exp")):
+            names.append(name)
+    return sorted(names)
+
+
+def generate_test_suite(version):
+    """Discover the suite for a version from v{version}/tests and v{version}/fails."""
+    return __generate_test_suite(
+        version,
+        discover_tests(f"v{version}/tests"),
+        discover_tests(f"v{version}/fails"),
+    )
+
+
+def generate_test_suite_from_archive(version, archive):
+    """Like generate_test_suite, but for the tests packed into a CorpusArchive of v{version}."""
+    names = archive.names()
+    tests = __generate_test_suite(
+        version,
+        [name[len("tests/") :] for name in names if name.startswith("tests/")],
+        [name[len("fails/") :] for name in names if name.startswith("fails/")],
+    )
+    for test in tests:
+        test["archive_entry"] = test["srcfile"][len(f"v{version}/") : -len(".brewin")]
+    return tests
+
+
 def generate_test_suite_v1():
     """wrapper for generate_test_suite for v1"""
-    tests = [
-        "test_begin1",
-        "test_begin2",
-        "test_bool_expr",
-        "test_compare_bool",
-        "test_compare_int",
-        "test_compare_null",
-        "test_compare_string",
-        "test_fields",
-        "test_function_call_same_class",
-        "test_fwd_call",
-        "test_if",
-        "test_inputi",
-        "test_inputs",
-        "test_instantiate_and_call1",
-        "test_instantiate_and_call2",
-        "test_instantiate_and_return1",
-        "test_instantiate_and_return2",
-        "test_int_ops",
-        "test_nested_calls",
-        "test_nothing",
-        "test_pass_by_value",
-        "test_print_bool",
-        "test_print_combo",
-        "test_print_int",
-        "test_print_string",
-        "test_recursion1",
-        "test_recursion2",
-        "test_return",
-        "test_return_exit",
-        "test_return_type",
-        "test_set_field",
-        "test_set_param",
-        "test_str_ops",
-        "test_while",
-        "test_create_object", 
-        "test_mutual_recursion",
-    ]
-    fails = [
-        "test_call_badargs",
-        "test_call_invalid_func",
-        "test_dup_class",
-        "test_dup_field",
-        "test_dup_method",
-        "test_eval_invalid_var",
-        "test_if",
-        "test_incompat_operands1",
-        "test_incompat_operands2",
-        "test_incompat_operands3",
-        "test_incompat_operands4",
-        "test_instantiate_invalid",
-        "test_null_objref",
-        "test_return_nothing",
-        "test_set_invalid_var",
-        "test_while",
-    ]
-    return __generate_test_suite(1, tests, fails)
+    return generate_test_suite(1)
 
 
 def generate_test_suite_v2():
     """wrapper for generate_test_suite for v2"""
-    return __generate_test_suite(
-        2,
-        [
-            "test_compare_null",
-            "test_return_default1",
-            "test_inher2",
-            "test_inher1",
-            "test_let",
-            "test_while",
-            "test_set_param",
-            "test_assign_null",
-            "test_begin",
-            "test_bool_expr",
-            "test_compare_bool",
-            "test_compare_int",
-            "test_compare_objref",
-            "test_compare_objref2",
-            "test_compare_string",
-            "test_fields",
-            "test_function_call_same_class",
-            "test_fwd_call",
-            "test_if",
-            "test_inher3_overload",
-            "test_inher4",
-            "test_inher5",
-            "test_inher6",
-            "test_inher7",
-            "test_inher8",
-            "test_inher9",
-            "test_inputi",
-            "test_inputs",
-            "test_instantiate_and_call",
-            "test_instantiate_and_return",
-            "test_int_ops",
-            "test_let_copy",
-            "test_let_shadow",
-            "test_let_shadow2",
-            "test_let_shadow3",
-            "test_let_shadow4",
-            "test_let2",
-            "test_let3_empty",
-            "test_ll",
-            "test_overload1",
-            "test_pass_by_value",
-            "test_pass_by_value2",
-            "test_print_bool",
-            "test_print_int",
-            "test_print_string",
-            "test_return",
-            "test_return_default2",
-            "test_return_exit",
-            "test_return_me",
-            "test_return_null",
-            "test_return_type",
-            "test_return_type2",
-            "test_return_type3",
-            "test_set_field",
-            "test_set_param",
-            "test_str_ops",
-            "test_while",
-            "more_tests/test_1b_return_me",
-            "more_tests/test_cmpwr552",
-            "more_tests/test_super_me"
-        ],
-        [
-            "test_incompat_return1", 
-            "test_let2", 
-            "test_inher1", 
-            "test_incompat_types2",
-            "test_bad_type_param",
-            "test_call_badargs",
-            "test_call_badargs2",
-            "test_call_invalid_func",
-            "test_dup_class",
-            "test_dup_field",
-            "test_dup_formal_param",
-            "test_dup_method",
-            "test_eval_invalid_var",
-            "test_if",
-            "test_incompat_compare2",
-            "test_incompat_operands1",
-            "test_incompat_operands2",
-            "test_incompat_operands3",
-            "test_incompat_return2",
-            "test_incompat_return3",
-            "test_incompat_return4",
-            "test_incompat_return5",
-            "test_incompat_types1",
-            "test_incompat_types3",
-            "test_inher2",
-            "test_inher3",
-            "test_instantiate_invalid",
-            "test_invalid_return_type",
-            "test_let",
-            "test_let3",
-            "test_missing_main",
-            "test_null_objref",
-            "test_poly1",
-            "test_return_assign_type",
-            "test_set_invalid_var",
-            "test_while",
-            "more_fails/test_base_super",
-            "more_fails/test_cmpwr445",
-            "more_fails/test_cmpwr450"
-        ],
-    )
+    return generate_test_suite(2)
 
-def get_files(path):
-    for file in os.listdir(path):
-        if os.path.isfile(os.path.join(path, file)):
-            yield file
 
 def generate_test_suite_v3():
     """wrapper for generate_test_suite for v3"""
-    test_files = get_files("C:\\Users\\andre\\Desktop\\CS 131 Quarter Project\\v3\\tests")
-    #tests = map(lambda a : a.replace(".brewin", ""), filter(lambda a : ".brewin" in a, test_files))
-    tests = []
-    fail_files = get_files("C:\\Users\\andre\\Desktop\\CS 131 Quarter Project\\v3\\fails")
-    fails = map(lambda a : a.replace(".brewin", ""), filter(lambda a : ".brewin" in a, fail_files))
-    return __generate_test_suite(3, tests, fails)
+    return generate_test_suite(3)
+
+
+def parse_shard(value):
+    """Parse an I/N --shard value into a 0-based (index, count)."""
+    index, _, count = value.partition("/")
+    index, count = int(index), int(count)
+    if not 1 <= index <= count:
+        raise ValueError(f"Shard {value} is not of the form I/N with 1 <= I <= N")
+    return index - 1, count
+
+
+def merge_main(argv):
+    """`tester.py merge`: combine per-shard results.json files into one"""
+    parser = argparse.ArgumentParser(
+        prog="tester.py merge", description="Merge per-shard results.json files."
+    )
+    parser.add_argument("results", nargs="+", help="results.json files to combine")
+    parser.add_argument("-o", "--output", default="results.json", help="merged file to write")
+    args = parser.parse_args(argv)
+    results = merge_results(args.results)
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(format_gradescope_output(results), handle, ensure_ascii=False, indent=4)
+    print(f"{get_score(results)}/{len(results)} tests passed.")
+
+
+def parse_arguments(argv):
+    """argparse wrapper for the tester's command line"""
+    parser = argparse.ArgumentParser(description="Run the Brewin test suites.")
+    parser.add_argument("version", help="interpreter version to test (1, 2 or 3)")
+    parser.add_argument(
+        "--lazy-input",
+        action="store_true",
+        help="memory-map each .in file and read it a line at a time",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="run test cases across this many worker processes",
+    )
+    parser.add_argument(
+        "--isolate",
+        action="store_true",
+        help="run each test case in its own child process, killed on timeout",
+    )
+    parser.add_argument(
+        "--cpu-limit",
+        type=int,
+        default=None,
+        help="with --isolate, CPU seconds each test process may use",
+    )
+    parser.add_argument(
+        "--memory-limit",
+        type=int,
+        default=None,
+        help="with --isolate, megabytes of address space each test process may use",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=None,
+        help="fail any test that executes more than this many statements",
+    )
+    parser.add_argument(
+        "--warm",
+        action="store_true",
+        help="run tests in persistent worker processes that import the interpreter once "
+        "and reuse one Interpreter per worker (a worker stuck in a timed-out test is "
+        "replaced), even with a single job",
+    )
+    parser.add_argument(
+        "--gc-freeze",
+        action="store_true",
+        help="in worker processes, gc.freeze() everything loaded at startup",
+    )
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        const=".test_cache.json",
+        default=None,
+        metavar="PATH",
+        help="skip tests whose interpreter sources and test files are unchanged since a "
+        "cached run (default cache file: .test_cache.json); repeated entries run once",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="record each test's interpreter execution statistics in results.json",
+    )
+    parser.add_argument(
+        "--rerun",
+        action="store_true",
+        help="with --cache, ignore cached results and run every test again",
+    )
+    parser.add_argument(
+        "--baseline",
+        metavar="PATH",
+        help="a results.json from an earlier run; exit non-zero if any test, or the total, "
+        "got slower than it by more than --threshold",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=20.0,
+        help="with --baseline, percentage slowdown tolerated (default 20)",
+    )
+    parser.add_argument(
+        "--regression-metric",
+        choices=["cpu_time", "wall_time"],
+        default="cpu_time",
+        help="with --baseline, which per-test timing to compare",
+    )
+    parser.add_argument(
+        "--differential",
+        metavar="ENGINE",
+        help="instead of checking .exp files, run every program on --engine and on ENGINE, "
+        "written MODULE[:OPTION,...] (e.g. interpreterv2 or interpreterv3:reference), and "
+        "report where they diverge",
+    )
+    parser.add_argument(
+        "--engine",
+        metavar="ENGINE",
+        help="with --differential, the engine to compare against ENGINE "
+        "(default: this version's interpreter with no options)",
+    )
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        default=0,
+        metavar="COUNT",
+        help="with --differential, also compare COUNT generated programs written in the "
+        "dialect both engines share",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="with --synthetic, seed for the program generator",
+    )
+    parser.add_argument(
+        "--archive",
+        metavar="PATH",
+        help="read the suite from a corpus archive (see brewinpack.py) of the version's "
+        "directory instead of from v{N}/",
+    )
+    parser.add_argument(
+        "--history",
+        nargs="?",
+        const=".test_durations.json",
+        default=None,
+        metavar="PATH",
+        help="record each test's duration (default file: .test_durations.json) and start the "
+        "longest tests first on later parallel runs",
+    )
+    parser.add_argument(
+        "--adaptive-timeout",
+        type=float,
+        default=None,
+        metavar="MULTIPLE",
+        help="with --history, time each known test out after MULTIPLE times its last duration",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        help="run only the I-th (1-based) of N deterministic, runtime-balanced slices of the suite",
+    )
+    parser.add_argument(
+        "--durations",
+        metavar="PATH",
+        help="with --shard, a results.json from a full earlier run whose per-test wall times "
+        "balance the shards (every shard must be given the same file)",
+    )
+    return parser.parse_args(argv)
 
 
 async def main():
     """main entrypoint: argparses, delegates to test scaffold, suite generator, gradescope output"""
-    if not sys.argv:
-        raise ValueError("Error: Missing version number argument")
-    version = sys.argv[1]
+    if sys.argv[1:2] == ["merge"]:
+        merge_main(sys.argv[2:])
+        return
+    args = parse_arguments(sys.argv[1:])
+    version = args.version
+
+    # read now: the run below overwrites results.json, the usual baseline
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
     module_name = f"interpreterv{version}"
     interpreter = importlib.import_module(module_name)
 
-    scaffold = TestScaffold(interpreter)
-
-    match version:
-        case "1":
-            tests = generate_test_suite_v1()
-        case "2":
-            tests = generate_test_suite_v2()
-        case "3":
-            tests = generate_test_suite_v3()
-        case _:
-            raise ValueError("Unsupported version; expect one of 1,2,3")
+    scaffold = TestScaffold(
+        interpreter, args.lazy_input, args.max_steps, args.warm, args.archive, args.stats
+    )
 
-    results = await run_all_tests(scaffold, tests)
+    if version not in ("1", "2", "3"):
+        raise ValueError("Unsupported version; expect one of 1,2,3")
+    if args.archive:
+        # the archive is the whole suite; don't glob v{N}/ for tests that won't run
+        tests = generate_test_suite_from_archive(version, scaffold.open_archive())
+    else:
+        match version:
+            case "1":
+                tests = generate_test_suite_v1()
+            case "2":
+                tests = generate_test_suite_v2()
+            case "3":
+                tests = generate_test_suite_v3()
+
+    if args.shard:
+        index, count = parse_shard(args.shard)
+        durations = load_durations(args.durations) if args.durations else {}
+        tests = shard_tests(tests, index, count, durations)
+        print(f"Shard {args.shard}: {len(tests)} tests")
+
+    if args.differential:
+        programs = []
+        for test in tests:
+            environment = scaffold.setup(test)
+            programs.append((test["srcfile"], environment["program"], environment["stdin"]))
+        engine = Engine.parse(args.engine) if args.engine else Engine(interpreter)
+        other = Engine.parse(args.differential)
+        programs += synthetic_programs(shared_version(engine, other), args.synthetic, args.seed)
+        sys.exit(1 if compare_engines(engine, other, programs) else 0)
+
+    results = await run_all_tests(
+        scaffold,
+        tests,
+        jobs=args.jobs,
+        isolate=args.isolate,
+        cpu_limit=args.cpu_limit,
+        memory_limit=args.memory_limit and args.memory_limit * 1024 * 1024,
+        warm=args.warm,
+        gc_freeze=args.gc_freeze,
+        cache=args.cache and ResultCache(args.cache, args.rerun),
+        history=args.history and DurationHistory(args.history),
+        timeout_multiplier=args.adaptive_timeout,
+    )
     total_score = get_score(results) / len(results) * 100.0
     print(f"Total Score: {total_score:9.2f}%")
 
     # flag that toggles write path for results.json
     write_gradescope_output(results, environ.get("PROD", False))
 
+    if baseline is not None:
+        regressions = find_regressions(
+            results, baseline, args.threshold / 100, args.regression_metric
+        )
+        for regression in regressions:
+            print(f"Performance regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
 
 if __name__ == "__main__":
     asyncio.run(main())